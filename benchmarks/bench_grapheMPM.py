@@ -0,0 +1,213 @@
+"""Mesures de performance de grapheMPM sur des graphes synthétiques.
+
+Chaque phase (construction, niveaux, dates, rendu graphviz, exports latex)
+est chronométrée sur plusieurs familles de graphes sans circuit et
+plusieurs tailles, avec le pic de mémoire allouée (tracemalloc, mesuré
+dans une exécution séparée pour ne pas fausser les temps).
+
+Les résultats sont enregistrés en json et comparés à une référence, par
+exemple celle du dépôt (sa section meta décrit la machine et les options
+de mesure; sur une autre machine, en produire une avec --sortie):
+
+    python benchmarks/bench_grapheMPM.py --tailles 10 100 1000 \\
+        --sortie resultats.json --reference benchmarks/reference.json
+
+Le code de retour vaut 1 si une phase a ralenti (ou consomme plus de
+mémoire) au-delà de la tolérance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy
+from grapheMPM import GrapheSimple, GrapheMPM, mat2tex
+
+
+def _nom(i):
+    return f"t{i}"
+
+
+def couches(N, graine=0, degre=3):
+    """graphe en couches d'environ sqrt(N) sommets, chaque sommet ayant
+    jusqu'à degre prédécesseurs dans la couche précédente
+    """
+    rng = random.Random(graine)
+    largeur = max(1, int(N**0.5))
+    p = {}
+    for i in range(N):
+        c = i // largeur
+        prec = range((c-1)*largeur, c*largeur) if c else range(0)
+        p[_nom(i)] = [_nom(j) for j in rng.sample(prec, min(degre, len(prec)))]
+    return p
+
+
+def aleatoire_creux(N, graine=0, degre=3):
+    """graphe aléatoire creux: chaque sommet i a jusqu'à degre
+    prédécesseurs tirés parmi les sommets j < i
+    """
+    rng = random.Random(graine)
+    return {_nom(i): [_nom(j) for j in rng.sample(range(i), min(degre, i))]
+            for i in range(N)}
+
+
+def chaine(N, graine=0):
+    """une seule longue chaîne de tâches
+    """
+    return {_nom(i): ([_nom(i-1)] if i else []) for i in range(N)}
+
+
+def eventail(N, graine=0):
+    """N-1 tâches indépendantes qui convergent vers une tâche finale
+    """
+    p = {_nom(i): [] for i in range(N-1)}
+    p[_nom(N-1)] = [_nom(i) for i in range(N-1)]
+    return p
+
+
+GENERATEURS = {"couches": couches, "aleatoire_creux": aleatoire_creux,
+               "chaine": chaine, "eventail": eventail}
+
+
+def _durees(p, graine=0):
+    rng = random.Random(graine)
+    return {k: rng.randint(1, 9) for k in p}
+
+
+def phases(p, N, max_dense, max_latex):
+    """liste des phases à mesurer: (nom, préparation, action); action
+    reçoit le résultat de la préparation
+    """
+    w = _durees(p)
+    # GrapheMPM ne modifie pas p: le sommet fin est ajouté en interne
+    mpm = lambda: GrapheMPM(pred=p, pond=w, sparse=True)
+
+    def dates():
+        G = mpm()
+        G.earliestdate()
+        return G
+
+    def complet():
+        G = dates()
+        G.latestdate()
+        return G
+
+    L = [("GrapheSimple.__init__", lambda: None,
+          lambda _: GrapheSimple(pred=p, sparse=True)),
+         ("GrapheMPM.__init__", lambda: None, lambda _: mpm()),
+         ("setlevel", mpm, lambda G: G.setlevel()),
+         ("earliestdate", mpm, lambda G: G.earliestdate()),
+         ("latestdate", dates, lambda G: G.latestdate()),
+         ("makeGraphviz", complet, lambda G: G.makeGraphviz())]
+    if N <= max_dense:
+        L.append(("GrapheSimple.__init__ (dense)", lambda: None,
+                  lambda _: GrapheSimple(pred=p)))
+    if N <= max_latex:
+        simple = lambda: GrapheSimple(pred=p, sparse=True)
+        L += [("tab_latex", simple, lambda G: G.tab_latex_pred),
+              ("mat2tex", simple, lambda G: mat2tex(G.mat_adj))]
+    return L
+
+
+def mesurer(preparation, action, repetitions):
+    """meilleur temps sur repetitions essais, puis pic mémoire (octets)
+    """
+    temps = float("inf")
+    for _ in range(repetitions):
+        x = preparation()
+        t = time.perf_counter()
+        action(x)
+        temps = min(temps, time.perf_counter() - t)
+    x = preparation()
+    tracemalloc.start()
+    action(x)
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return temps, pic
+
+
+def lancer(tailles, generateurs, repetitions, max_dense, max_latex):
+    resultats = []
+    for nom in generateurs:
+        for N in tailles:
+            p = GENERATEURS[nom](N)
+            for phase, prep, action in phases(p, N, max_dense, max_latex):
+                temps, pic = mesurer(prep, action, repetitions)
+                resultats.append({"generateur": nom, "N": N, "phase": phase,
+                                  "temps": temps, "pic": pic})
+                print(f"{nom:16} {N:>7} {phase:32} {temps*1e3:10.2f} ms "
+                      f"{pic/2**20:9.2f} Mo", flush=True)
+    return resultats
+
+
+def comparer(resultats, reference, tolerance, plancher):
+    """lister les phases qui régressent par rapport à la référence.
+
+    :param tolerance: rapport nouveau/référence toléré
+    :param plancher: écart de temps (s) en dessous duquel on ignore le bruit
+    """
+    ref = {(r["generateur"], r["N"], r["phase"]): r for r in reference}
+    regressions = []
+    for r in resultats:
+        cle = (r["generateur"], r["N"], r["phase"])
+        if cle not in ref:
+            continue
+        a = ref[cle]
+        if (r["temps"] > tolerance*a["temps"]
+                and r["temps"] - a["temps"] > plancher):
+            regressions.append((cle, "temps", a["temps"], r["temps"]))
+        if r["pic"] > tolerance*a["pic"] and r["pic"] - a["pic"] > 2**20:
+            regressions.append((cle, "pic", a["pic"], r["pic"]))
+    return regressions
+
+
+def main(argv=None):
+    P = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    P.add_argument("--tailles", type=int, nargs="+",
+                   default=[10, 100, 1000, 10000])
+    P.add_argument("--generateurs", nargs="+", default=list(GENERATEURS),
+                   choices=list(GENERATEURS))
+    P.add_argument("--repetitions", type=int, default=3)
+    P.add_argument("--max-dense", type=int, default=1000,
+                   help="taille max pour la construction dense")
+    P.add_argument("--max-latex", type=int, default=1000,
+                   help="taille max pour les exports latex")
+    P.add_argument("--sortie", help="fichier json des résultats")
+    P.add_argument("--reference", help="fichier json de référence")
+    P.add_argument("--tolerance", type=float, default=1.5)
+    P.add_argument("--plancher", type=float, default=0.005)
+    args = P.parse_args(argv)
+
+    resultats = lancer(args.tailles, args.generateurs, args.repetitions,
+                       args.max_dense, args.max_latex)
+    if args.sortie:
+        meta = {"date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "numpy": numpy.__version__,
+                "machine": platform.platform(),
+                "processeur": platform.processor() or platform.machine(),
+                "coeurs": os.cpu_count(),
+                "tailles": args.tailles, "repetitions": args.repetitions}
+        Path(args.sortie).write_text(json.dumps(
+            {"meta": meta, "resultats": resultats}, indent=1))
+    if args.reference:
+        reference = json.loads(Path(args.reference).read_text())
+        regressions = comparer(resultats, reference["resultats"],
+                               args.tolerance, args.plancher)
+        for (gen, N, phase), quoi, avant, apres in regressions:
+            print(f"RÉGRESSION {gen} N={N} {phase} ({quoi}): "
+                  f"{avant:.4g} -> {apres:.4g}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,20 @@
-from numpy import asarray, prod, float16, round, floor, uint8
-from graphviz import Digraph
-from lxml import etree
-from pandas import DataFrame
+from numpy import (asarray, rint, uint8, zeros, int_,
+                   int64, sort, cumsum, bincount, nonzero, repeat,
+                   diff, arange, full, concatenate, subtract, bitwise_or,
+                   unpackbits, uint64, float64, maximum, minimum, split,
+                   insert, delete, searchsorted, atleast_2d, absolute,
+                   frombuffer, argsort, ones, where)
+from numpy import save as ecrire_npy, load as lire_npy
+from numpy.linalg import matrix_power
+from collections import OrderedDict
+from functools import cached_property
+from bisect import bisect_left
+from pathlib import Path
+import io
+import json
+import re
+
+from .mesures import phase as _phase
 
 
 """.. py:module:: graphMPM
@@ -13,6 +26,12 @@ from pandas import DataFrame
 .. py:function:: mat2tex
     Générer la version latex pmatrix d'une matrice.
 
+.. py:function:: ecrire_tab_latex, ecrire_pmatrix
+    mêmes exports latex, écrits ligne par ligne dans un flux texte.
+
+.. py:exception:: CircuitError
+    levée quand un calcul qui exige un graphe sans circuit en rencontre un.
+
 .. py:class:: noeud
     objet de description d'un nœud MPM sous forme d'un
     dictionnaire, rendu par un tableau html dans le graphe.
@@ -26,37 +45,94 @@ from pandas import DataFrame
     des dates au plus tôt et au plus tard.
 """
 
-def tab_latex(t:dict, p:bool)->str:
-    """vers la version latex du tableau des prédécesseurs/successeurs.
+class CircuitError(ValueError):
+    """le graphe comporte un circuit; l'attribut circuit contient la liste
+    des sommets d'un circuit, le premier étant répété à la fin.
+    """
+    def __init__(self, circuit, message="circuit détecté"):
+        self.circuit = circuit
+        ValueError.__init__(self, f"{message}: {' -> '.join(map(str, circuit))}")
+
+
+# caractères spéciaux de LaTeX en mode texte
+_LATEX = str.maketrans({"&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#",
+                        "_": r"\_", "{": r"\{", "}": r"\}",
+                        "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+                        "\\": r"\textbackslash{}"})
+
+
+def ecrire_tab_latex(t:dict, p:bool, flux):
+    """écrire dans un flux texte le tableau latex des
+    prédécesseurs/successeurs, ligne par ligne, sans copie du dictionnaire.
 
     il arrive que les valeurs soient sous forme de liste dans les
     prédécesseurs par exemple:{'1': ['1'], '2': ['1', '2', '3'], '3': ['2',
     '3'], '4': ['1', '4', '5'], '5': ['4', '5']}. on les joint en
-    chaine.
+    chaine. Les colonnes sont alignées, les caractères spéciaux échappés.
 
     :param t: dictionnaire à traiter
     :param p: booléen d'activation si c'est le tableau des prédecesseurs
+    :param flux: flux texte (fichier ouvert, io.StringIO…)
     """
-    # attention on travaille sur une copie du dictionnaire
-    # sinon cela modifie l'original dans l'objet GrapheSimple…
-    tmp = t.copy()
-    for i in tmp.keys():
-        # on sépare tous les éléments par ,
-        ch = ','.join(list(tmp[i]))
-        tmp.update({i:ch})
-    tmp = sorted(tmp.items(), key=lambda x: x[0])
-    T = [ list(x) for x in tmp ]
-    columns_labels = ["Sommet",
-                      ("Prédécesseur(s)" if p else "Successeur(s)")]
-    df = DataFrame(T, columns=columns_labels)
-    return df.style.to_latex(column_format='|'+2*'c|')
+    cellules = lambda k: (str(k).translate(_LATEX),
+                          ",".join(t[k]).translate(_LATEX))
+    entete = ("Sommet", ("Prédécesseur(s)" if p else "Successeur(s)"))
+    cles = sorted(t)
+    # 1ere passe: largeur des colonnes
+    l1, l2 = map(len, entete)
+    for k in cles:
+        a, b = cellules(k)
+        l1, l2 = max(l1, len(a)), max(l2, len(b))
+    ligne = lambda a, b: f"{a:>{l1}} & {b:>{l2}} \\\\\n"
+    flux.write("\\begin{tabular}{|c|c|}\n\\toprule\n")
+    flux.write(ligne(*entete))
+    flux.write("\\midrule\n")
+    for k in cles:
+        flux.write(ligne(*cellules(k)))
+    flux.write("\\bottomrule\n\\end{tabular}\n")
+
+
+def tab_latex(t:dict, p:bool)->str:
+    """vers la version latex du tableau des prédécesseurs/successeurs,
+    voir ecrire_tab_latex.
+
+    :param t: dictionnaire à traiter
+    :param p: booléen d'activation si c'est le tableau des prédecesseurs
+    """
+    f = io.StringIO()
+    ecrire_tab_latex(t, p, f)
+    return f.getvalue()
+
+
+def _ecrire_lignes_pmatrix(lignes, flux):
+    """écrire une pmatrix dont les lignes (listes de nombres) sont fournies
+    une à une
+    """
+    flux.write("\\begin{pmatrix}\n")
+    for L in lignes:
+        flux.write("  " + " & ".join(map(str, L)) + "\\\\\n")
+    flux.write("\\end{pmatrix}")
+
+
+def ecrire_pmatrix(M, flux):
+    """écrire dans un flux texte la version tex d'une matrice, une ligne de
+    la matrice à la fois: exacte quelle que soit sa taille (pas de résumé
+    « ... » comme dans str(M)).
+
+    :param M: matrice (numpy array à une ou deux dimensions)
+    :param flux: flux texte (fichier ouvert, io.StringIO…)
+    """
+    if len(M.shape) > 2:
+        raise ValueError('pmatrix can at most display two dimensions')
+    if len(M.shape) < 2:
+        M = M.reshape(1, -1)
+    _ecrire_lignes_pmatrix((r.tolist() for r in M), flux)
 
 
 def mat2tex(M):
     """construire la version tex d'une matrice, avec jolis retours
     à la ligne pour un pretty print.
 
-    src: stackoverflow.com - numpy-2d-and-1d-array-to-latex-bmatrix
     :returns: LaTeX pmatrix as a string
     :param M: matrice
     :type M: numpy array
@@ -67,16 +143,447 @@ def mat2tex(M):
     >>> mat2tex(G.mat_ferm_transitive)
 
     """
-    if len(M.shape) > 2:
-        raise ValueError('pmatrix can at most display two dimensions')
-    lines = str(M).replace('[', '').replace(']', '').splitlines()
-    rv = [r'\begin{pmatrix}']
-    rv += ['  ' + ' & '.join(l.split()) + r'\\' for l in lines]
-    rv += [r'\end{pmatrix}']
-    return '\n'.join(rv)
+    f = io.StringIO()
+    ecrire_pmatrix(M, f)
+    return f.getvalue()
+
+
+def _voisins(v, index):
+    """indices des sommets cités dans une valeur d'un dictionnaire des
+    successeurs/prédécesseurs.
+
+    une chaîne est lue comme une suite de noms d'un seul caractère ("AB"),
+    sinon on parcourt les éléments (liste, tuple…). Les noms inconnus sont
+    ignorés, comme dans la construction dense.
+
+    :param v: valeur du dictionnaire (str ou itérable de noms)
+    :param index: dict nom du sommet -> indice (à partir de 0)
+    :rtype: list
+    """
+    return [index[e] for e in v if e in index]
+
+
+_PREC_MAX = 6 # décimales au plus des durées en virgule fixe
+_CAPACITE = 2**63 # les dates (sommes de durées) sont des int64
+
+
+def _decimales(v):
+    """nombre de chiffres après la virgule de v (nombre ou texte), borné
+    par _PREC_MAX: une durée calculée comme 1/3 est arrondie au millionième
+    au lieu d'imposer l'unité 10**-16
+
+    >>> _decimales("4.25"), _decimales(7), _decimales(1/3)
+    (2, 0, 6)
+    """
+    return min(len(str(v).partition(".")[2]), _PREC_MAX)
+
+
+def _verifier_capacite(total, prec):
+    """lever ValueError si total, somme des valeurs absolues des durées en
+    unités de 10**-prec, ne tient pas dans un int64: les dates déborderaient
+    sans erreur
+    """
+    if total >= _CAPACITE:
+        raise ValueError("durées trop grandes pour des dates int64 à "
+                         f"{prec} décimales (somme ≥ 2**63 * 10**-{prec})")
+
+
+def _virgule_fixe(v, prec):
+    """valeur v (nombre ou texte) en entier d'unité 10**-prec; un nombre
+    décimal écrit en clair est converti sans passer par un flottant
+
+    >>> _virgule_fixe("4.25", 2), _virgule_fixe(7, 2)
+    (425, 700)
+    """
+    e, _, d = str(v).strip().partition(".")
+    if len(d) <= prec:
+        try:
+            return int(e + d.ljust(prec, "0"))
+        except ValueError: # 1e+20, nan…
+            pass
+    return int(rint(float(v) * 10**prec))
+
+
+def _distincts(a):
+    """valeurs distinctes triées d'un array d'entiers (comme numpy.unique,
+    mais par tri et comparaison des voisins, bien plus rapide)
+    """
+    a = sort(a)
+    if len(a) > 1:
+        a = a[concatenate(([True], a[1:] != a[:-1]))]
+    return a
+
+
+def _csr(N, src, dst):
+    """construire un stockage CSR (compressed sparse row) à partir de la
+    liste des arcs src[k] -> dst[k], sans doublons, triés par ligne puis
+    par colonne.
+
+    :param N: nombre de sommets
+    :param src: array des origines des arcs
+    :param dst: array des extrémités des arcs
+    :returns: (indptr, indices) les voisins de i sont
+        indices[indptr[i]:indptr[i+1]]
+    """
+    codes = _distincts(asarray(src, dtype=int64)*N + asarray(dst, dtype=int64))
+    lignes, indices = codes // N, codes % N
+    indptr = zeros(N+1, dtype=int64)
+    cumsum(bincount(lignes, minlength=N), out=indptr[1:])
+    return indptr, indices
+
+
+def _csr_modifie(csr, i, j, ajout):
+    """ajouter (ajout=True) ou retirer l'arc i -> j d'un stockage CSR, en
+    gardant les voisins triés.
+
+    :returns: nouveau couple (indptr, indices)
+    """
+    indptr, indices = csr
+    a, b = indptr[i], indptr[i+1]
+    k = a + searchsorted(indices[a:b], j)
+    indptr = indptr.copy()
+    if ajout:
+        indices = insert(indices, k, j)
+        indptr[i+1:] += 1
+    else:
+        indices = delete(indices, k)
+        indptr[i+1:] -= 1
+    return indptr, indices
+
+
+def _atteints(csr, departs):
+    """ensemble des sommets atteints depuis departs par un chemin non vide
+    (parcours en profondeur, limité à la zone concernée)
+    """
+    indptr, indices = csr
+    vus = set()
+    pile = list(departs)
+    while pile:
+        u = pile.pop()
+        for v in indices[indptr[u]:indptr[u+1]].tolist():
+            if v not in vus:
+                vus.add(v)
+                pile.append(v)
+    return vus
+
+
+def _ordre_local(R, succ_csr, pred_csr):
+    """ordre topologique (Kahn) du sous-graphe induit par l'ensemble R.
+
+    en échangeant succ_csr et pred_csr on obtient l'ordre inverse.
+    """
+    sptr, sind = succ_csr
+    pptr, pind = pred_csr
+    deg = {v: sum(1 for p in pind[pptr[v]:pptr[v+1]].tolist() if p in R)
+           for v in R}
+    pile = [v for v, n in deg.items() if n == 0]
+    ordre = []
+    while pile:
+        u = pile.pop()
+        ordre.append(u)
+        for v in sind[sptr[u]:sptr[u+1]].tolist():
+            if v in deg:
+                deg[v] -= 1
+                if deg[v] == 0:
+                    pile.append(v)
+    return ordre
+
+
+def _plages(indptr, F):
+    """positions des voisins des sommets F dans un stockage CSR, mises bout
+    à bout: concaténation des range(indptr[f], indptr[f+1]) pour f dans F.
+    """
+    debuts = indptr[F]
+    longueurs = indptr[F+1] - debuts
+    decalage = debuts - cumsum(longueurs) + longueurs
+    return repeat(decalage, longueurs) + arange(longueurs.sum())
+
+
+def _kahn(succ_csr, pred_csr):
+    """tri topologique par couches (algorithme de Kahn) en O(V+E).
+
+    la couche c contient les sommets dont tous les prédécesseurs sont dans
+    les couches précédentes: c'est la longueur du plus long chemin qui
+    aboutit au sommet.
+
+    :returns: (niv, ordre) niv array des couches (-1 pour les sommets
+        bloqués par un circuit), ordre array des sommets rangés par couche
+    """
+    indptr, indices = succ_csr
+    deg = diff(pred_csr[0]) # degrés entrants
+    N = len(deg)
+    niv = full(N, -1, dtype=int64)
+    F = nonzero(deg == 0)[0]
+    couches = []
+    c = 0
+    while len(F) > 0:
+        niv[F] = c
+        couches.append(F)
+        cibles = indices[_plages(indptr, F)]
+        subtract.at(deg, cibles, 1)
+        F = _distincts(cibles[deg[cibles] == 0])
+        c += 1
+    ordre = (concatenate(couches) if couches else zeros(0, dtype=int64))
+    return niv, ordre
+
+
+def _bits_fermeture(succ_csr, ordre):
+    """matrice de fermeture transitive sous forme de bitsets: la ligne i
+    est un array de uint64 dont le bit j vaut 1 ssi j est accessible depuis
+    i par un chemin non vide.
+
+    si ordre contient tous les sommets (graphe sans circuit) on propage en
+    ordre topologique inverse: R[i] = OU des (j | R[j]) pour j successeur
+    de i. Sinon on applique l'algorithme de Warshall sur les bitsets.
+
+    :param succ_csr: stockage CSR des successeurs
+    :param ordre: ordre topologique (éventuellement partiel)
+    :rtype: numpy.array de forme (N, ceil(N/64))
+    """
+    indptr, indices = succ_csr
+    N = len(indptr) - 1
+    W = (N + 63) // 64
+    R = zeros((N, W), dtype=uint64)
+    un = uint64(1)
+    mots, masques = indices >> 6, un << (indices & 63).astype(uint64)
+    if len(ordre) == N: # sans circuit
+        for i in ordre[::-1]:
+            a, b = indptr[i], indptr[i+1]
+            if a == b:
+                continue
+            R[i] = bitwise_or.reduce(R[indices[a:b]], axis=0)
+            bitwise_or.at(R[i], mots[a:b], masques[a:b])
+    else: # Warshall
+        lignes = repeat(arange(N), diff(indptr))
+        bitwise_or.at(R, (lignes, mots), masques)
+        for k in range(N):
+            L = nonzero(R[:, k >> 6] & (un << uint64(k & 63)))[0]
+            R[L] |= R[k]
+    return R
+
+
+def _reduction_transitive(succ_csr, R):
+    """arcs de la réduction transitive d'un graphe sans circuit: l'arc
+    i -> j est conservé ssi j n'est accessible depuis aucun autre successeur
+    de i, c'est-à-dire n'est pas dans l'union des bitsets R[k] des
+    successeurs k de i.
+
+    les unions sont calculées par blocs de sommets (bitwise_or.reduceat),
+    chaque bloc portant sur une trentaine de Mo de bitsets au plus.
+
+    :param succ_csr: stockage CSR des successeurs
+    :param R: bitsets de la fermeture transitive (voir _bits_fermeture)
+    :returns: masque des arcs conservés, rangés comme succ_csr[1]
+    """
+    indptr, indices = succ_csr
+    N = len(indptr) - 1
+    garde = ones(len(indices), dtype=bool)
+    pas = max(1, 2**22 // max(R.shape[1], 1)) # arcs par bloc
+    mots, decalages = indices >> 6, (indices & 63).astype(uint64)
+    debut = 0
+    while debut < N:
+        fin = int(searchsorted(indptr, indptr[debut] + pas, side="right")) - 1
+        fin = min(max(fin, debut + 1), N)
+        a, b = indptr[debut], indptr[fin]
+        if a < b:
+            nb = diff(indptr[debut:fin+1])
+            V = nonzero(nb)[0]
+            U = bitwise_or.reduceat(R[indices[a:b]], indptr[debut:fin][V] - a)
+            lignes = repeat(arange(len(V)), nb[V])
+            bits = (U[lignes, mots[a:b]] >> decalages[a:b]) & uint64(1)
+            garde[a:b] = bits == 0
+        debut = fin
+    return garde
+
+
+def _plan_couches(niv, succ_csr, pred_csr):
+    """préparer l'évaluation par couches d'un graphe sans circuit.
+
+    :param niv: array des niveaux des sommets
+    :returns: (avant, arriere) listes de triplets d'arrays par couche:
+        avant: (sommets de la couche, leurs prédécesseurs mis bout à bout,
+        début du bloc de chaque sommet) en ordre croissant des niveaux;
+        arriere: idem avec les successeurs, sommets sans successeur exclus,
+        en ordre décroissant.
+    """
+    ordre = niv.argsort(kind="stable")
+    couches = split(ordre, cumsum(bincount(niv))[:-1])
+    plan = []
+    for (indptr, indices), C in [(pred_csr, couches),
+                                 (succ_csr, couches[::-1])]:
+        etapes = []
+        for L in C:
+            L = L[indptr[L+1] > indptr[L]]
+            if len(L) == 0:
+                continue
+            nb = indptr[L+1] - indptr[L]
+            etapes.append((L, indices[_plages(indptr, L)], cumsum(nb) - nb))
+        plan.append(etapes)
+    return tuple(plan)
+
+
+def _evaluer(plan, D, fin):
+    """dates de S scénarios de durées à la fois, couche par couche.
+
+    :param plan: résultat de _plan_couches
+    :param D: array (S, N) des durées
+    :param fin: indice du sommet fin
+    :returns: dict des arrays ed, ld (S, N), duree (S,), critique (S, N)
+    """
+    avant, arriere = plan
+    ed = zeros(D.shape, dtype=D.dtype)
+    for L, P, debuts in avant:
+        ed[:, L] = maximum.reduceat(ed[:, P] + D[:, P], debuts, axis=1)
+    ld = ed.copy() # sommets sans successeur: ld = ed
+    for L, S, debuts in arriere:
+        ld[:, L] = minimum.reduceat(ld[:, S], debuts, axis=1) - D[:, L]
+    duree = ed[:, fin]
+    # tolérance relative pour les durées décimales
+    critique = (ld - ed) <= 1e-9 * absolute(duree)[:, None]
+    return {"ed": ed, "ld": ld, "duree": duree, "critique": critique}
+
+
+class _Puissances():
+    """vue paresseuse de la liste [fermeture transitive, M^1, …, M^n] des
+    puissances de la matrice d'adjacence M d'un GrapheSimple (ou de leurs
+    exports latex).
+
+    l'élément k n'est calculé qu'au premier accès puis conservé dans un
+    cache LRU borné (GrapheSimple.taille_cache éléments). M^k est obtenu en
+    un produit depuis M^(k-1) si celle-ci est en cache, sinon par
+    exponentiation rapide.
+    """
+    def __init__(self, graphe, latex=False):
+        self.graphe = graphe
+        self.latex = latex
+        self.cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.graphe._noms) + 1
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("indice de puissance hors limites")
+        if k in self.cache:
+            self.cache.move_to_end(k)
+            return self.cache[k]
+        v = self._calculer(k)
+        self.cache[k] = v
+        if len(self.cache) > self.graphe.taille_cache:
+            self.cache.popitem(last=False)
+        return v
+
+    def _calculer(self, k):
+        G = self.graphe
+        if self.latex:
+            M = G.Matrices[k]
+            with _phase("puissances.latex") as ph:
+                tex = mat2tex(M)
+                ph.noter(octets=len(tex))
+            return tex
+        if k == 0:
+            return G.mat_ferm_transitive
+        A = G.mat_adj
+        with _phase("puissances") as ph:
+            if k == 1:
+                M = A.copy()
+            elif k-1 in self.cache:
+                M = self.cache[k-1] @ A # numpy.matmul
+            else:
+                M = matrix_power(A, k)
+            ph.noter(octets=M.nbytes)
+        return M
+
+
+_TABLE = ('<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" '
+          'CELLPADDING="4">')
+# chaque morceau: (gabarit %, champs insérés dans l'ordre)
+_TITRE = ('<TR><TD COLSPAN="2" PORT="here">%s</TD></TR>', ("titre",))
+_DATES = ('<TR><TD>%s</TD><TD>%s</TD></TR>', ("ed", "ld"))
+_MARGES = {1: ('<TR><TD COLSPAN="2">%s</TD></TR>'
+               '<TR><TD COLSPAN="2">%s</TD></TR>', ("ml", "mt")),
+           2: ('<TR><TD>%s</TD><TD>%s</TD></TR>', ("ml", "mt")),
+           3: ('<TR><TD>%s</TD><TD>%s</TD></TR>', ("ml", "mt"))}
+_GABARITS = {}
+
+
+def _gabarit(presentation, marges):
+    """gabarit du tableau html d'un nœud selon la présentation et
+    l'affichage des marges, calculé une fois par variante.
+
+    :returns: (gabarit, champs) à remplir par gabarit % (valeurs des champs)
+    """
+    cle = (presentation, bool(marges))
+    if cle not in _GABARITS:
+        m = ([_MARGES[presentation]] if marges and presentation in _MARGES
+             else [])
+        if presentation <= 2:
+            morceaux = [_TITRE, _DATES] + m
+        elif presentation == 3:
+            morceaux = [_DATES] + m + [_TITRE]
+        else:
+            morceaux = None
+        if morceaux is None:
+            _GABARITS[cle] = (_TABLE[:-1] + "/>", ())
+        else:
+            _GABARITS[cle] = (_TABLE + "".join(g for g, _ in morceaux)
+                              + "</TABLE>",
+                              sum((c for _, c in morceaux), ()))
+    return _GABARITS[cle]
+
+
+def _echappe(s):
+    """échapper un texte pour le html de graphviz (comme lxml: &, <, > et
+    caractères non ascii en références numériques)
+    """
+    s = s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return s if s.isascii() else s.encode("ascii", "xmlcharrefreplace").decode()
+
+
+# citation des identifiants DOT, comme graphviz.quoting
+_HTML = re.compile(r'<.*>$', re.DOTALL)
+_ID = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*|-?(\.[0-9]+|[0-9]+(\.[0-9]*)?))$')
+_MOTS_DOT = {"node", "edge", "graph", "digraph", "subgraph", "strict"}
+_GUILLEMET = re.compile(r'(?P<e>(?:\\{2})*)\\?(?P<q>")')
+
+
+def _dot_id(s):
+    """identifiant DOT, entre guillemets si besoin (html <…> laissé tel quel)
+    """
+    if _HTML.match(s):
+        return s
+    if not _ID.match(s) or s.lower() in _MOTS_DOT:
+        return '"' + _GUILLEMET.sub(r'\g<e>\\\g<q>', s) + '"'
+    return s
+
+
+def _dot_extremite(s):
+    """extrémité d'arc DOT: nom[:port[:compas]]
+    """
+    nom, _, reste = s.partition(":")
+    morceaux = [_dot_id(nom)]
+    if reste:
+        port, _, compas = reste.partition(":")
+        morceaux.append(_dot_id(port))
+        if compas:
+            morceaux.append(compas)
+    return ":".join(morceaux)
 
 
 class noeud():
+    __slots__ = ("data", "titre", "presentation", "marges", "_html")
+
     def __init__(self, titre, presentation=1, marges=True, **kwargs):
         """initialisation d'un nœud dans un graphe MPM
         (potentiels Metra)
@@ -99,66 +606,31 @@ class noeud():
         self.titre = titre
         self.presentation = presentation
         self.marges = marges
-        self.setdata(**kwargs)
+        self._html = None
 
     def setdata(self, **kwargs):
         """mettre à jour les données du noeud
         les paramètres doivent être de type str
+
+        le tableau html n'est reconstruit qu'à la prochaine lecture de
+        self.noeud
         """
         self.data.update(kwargs)
-        E = etree.Element("TABLE")
-        D = {"BORDER":"0", "CELLBORDER":"1",
-             "CELLSPACING":"0", "CELLPADDING":"4"}
-        E.attrib.update(D)
-        if self.presentation<=2:
-            T1 = etree.SubElement(E, "TR")
-            ti = etree.SubElement(T1, "TD")
-            ti.text = self.titre
-            ti.attrib["COLSPAN"] = str(2)
-            ti.attrib["PORT"] = "here"
-
-            T2 = etree.SubElement(E, "TR")
-            t21 = etree.SubElement(T2, "TD")
-            t21.text = self.data["ed"]
-            #t21.attrib["PORT"]="to"
-            t22 = etree.SubElement(T2, "TD")
-            t22.text = self.data["ld"]
-        elif self.presentation == 3:
-            T2 = etree.SubElement(E, "TR")
-            t21 = etree.SubElement(T2, "TD")
-            t21.text = self.data["ed"]
-            #t21.attrib["PORT"]="to"
-            t22 = etree.SubElement(T2, "TD")
-            t22.text = self.data["ld"]
-            if self.marges:
-                T3 = etree.SubElement(E, "TR")
-                t31 = etree.SubElement(T3, "TD")
-                t31.text = self.data["ml"]
-                t32 = etree.SubElement(T3, "TD")
-                t32.text = self.data["mt"]
-            T1 = etree.SubElement(E, "TR")
-            ti = etree.SubElement(T1, "TD")
-            ti.text = self.titre
-            ti.attrib["COLSPAN"] = str(2)
-            ti.attrib["PORT"] = "here"
-
-        #t22.attrib["PORT"]="from"
-        if (self.presentation == 1) and self.marges:
-            T3 = etree.SubElement(E, "TR")
-            t31 = etree.SubElement(T3, "TD")
-            t31.text = self.data["ml"]
-            t31.attrib["COLSPAN"] = str(2)
-            T4 = etree.SubElement(E, "TR")
-            t41 = etree.SubElement(T4, "TD")
-            t41.text = self.data["mt"]
-            t41.attrib["COLSPAN"] = str(2)
-        elif (self.presentation == 2) and self.marges:
-            T3 = etree.SubElement(E, "TR")
-            t31 = etree.SubElement(T3, "TD")
-            t31.text = self.data["ml"]
-            t32 = etree.SubElement(T3, "TD")
-            t32.text = self.data["mt"]
-        self.noeud = str(etree.tostring(E), 'utf-8')
+        self._html = None
+
+    @property
+    def noeud(self):
+        """str du tableau html du nœud, rendu à la demande
+        """
+        if self._html is None:
+            gabarit, champs = _gabarit(self.presentation, self.marges)
+            D = dict(self.data, titre=self.titre)
+            V = [D[c] for c in champs]
+            brut = "".join(V)
+            if not brut.isascii() or "&" in brut or "<" in brut or ">" in brut:
+                V = [_echappe(v) for v in V]
+            self._html = gabarit % tuple(V)
+        return self._html
 
 
 class GrapheSimple():
@@ -176,6 +648,14 @@ class GrapheSimple():
     n est le nombre de sommets.
     :list Matrices_latex: liste des mêmes matrices en export latex pmatrix.
 
+    Les questions d'accessibilité (« X dépend-il, même indirectement, de
+    Y ? ») passent par reaches(Y, X), ancestors(X) et descendants(Y), sans
+    matérialiser mat_ferm_transitive.
+
+    Matrices, Matrices_latex et les tableaux latex sont calculés au premier
+    accès; pour les deux listes, seuls les taille_cache derniers éléments
+    consultés sont conservés.
+
     Exemple::
 
     >>> p = {"A": "", "B": "", "C": "A", "D": "AB", "E":"B",
@@ -198,9 +678,30 @@ class GrapheSimple():
     >>> GS.Matrices_latex
     >>> print(GS.tab_latex_pred)
 
+    Mode creux: avec ``sparse=True`` les listes d'adjacence (CSR) sont
+    construites en O(V+E) directement depuis le dictionnaire fourni; la
+    matrice d'adjacence dense et les matrices qui en dépendent ne sont
+    calculées qu'au premier accès. Dans ce mode une valeur de type str est
+    lue comme une suite de noms d'un caractère: utiliser des listes pour
+    des noms plus longs.
+
+    >>> GS = GrapheSimple(pred=p, sparse=True)
+    >>> GS.successeurs["A"]
+    ['C', 'D']
     """
 
-    def __init__(self, succ=None, pred=None, make_node=str):
+    # nombre de puissances (et d'exports latex) gardées en cache
+    taille_cache = 16
+
+    def __init__(self, succ=None, pred=None, make_node=str, sparse=False):
+        self.sparse = sparse
+        self._mat_adj = None
+        self._matrices = _Puissances(self)
+        self._matrices_latex = _Puissances(self, latex=True)
+        self._tab_latex = {}
+        self._topo = None
+        self._bits = self._bits_pred = None
+        self._ferm = self._reduction = None
         if succ:
             self.successeurs = succ
             # dict des objets sommets — surtout utile pour GrapheMPM
@@ -212,16 +713,20 @@ class GrapheSimple():
             N = len(ssort)
             d = dict(zip(range(1, N+1), ssort))
             self.num_sommets = d
-            self.mat_adj = asarray([[(1 if (d[j] in succ[d[i]]) else 0)
-                                     for j in range(1, N+1)]
-                                    for i in range(1, N+1)])
+            self._noms = ssort
+            self._index = {k: i for i, k in enumerate(ssort)}
+            with _phase("adjacence") as ph:
+                if sparse:
+                    self._build_sparse(succ, direct=True)
+                else:
+                    self._mat_adj = asarray([[(1 if (d[j] in succ[d[i]])
+                                               else 0)
+                                              for j in range(1, N+1)]
+                                             for i in range(1, N+1)])
+                    self._build_sparse_from_dense()
+                ph.noter(octets=self._octets_adjacence())
             # dico des prédecesseurs
-            P = {}
-            for i in range(1, N+1):
-                pi = [d[j+1] for j in range(N)
-                      if self.mat_adj[j, i-1] != 0]
-                P[d[i]] = pi
-            self.predecesseurs = P
+            self.predecesseurs = self._dict_voisins(self._pred_csr)
         elif pred:
             self.predecesseurs = pred
             # sommets: set(succ.keys())
@@ -233,67 +738,495 @@ class GrapheSimple():
             N = len(ssort)
             d = dict(zip(range(1, N+1), ssort))
             self.num_sommets = d
-            self.mat_adj = asarray([[(1 if (d[i] in pred[d[j]]) else 0)
-                                     for j in range(1, N+1)]
-                                    for i in range(1, N+1)])
+            self._noms = ssort
+            self._index = {k: i for i, k in enumerate(ssort)}
+            with _phase("adjacence") as ph:
+                if sparse:
+                    self._build_sparse(pred, direct=False)
+                else:
+                    self._mat_adj = asarray([[(1 if (d[i] in pred[d[j]])
+                                               else 0)
+                                              for j in range(1, N+1)]
+                                             for i in range(1, N+1)])
+                    self._build_sparse_from_dense()
+                ph.noter(octets=self._octets_adjacence())
             # dico des successeurs
-            S = {}
-            for i in range(1, N+1):
-                pi = [d[j+1] for j in range(N)
-                      if self.mat_adj[i-1, j] != 0]
-                S[d[i]] = pi
-            self.successeurs = S
-
-        # construction mat. de ferm. transitive
-        Mtmp = self.mat_adj.copy()
-        Puissances = [Mtmp]
-        for i in range(len(self.sommets)-1): # on a déjà la puissance 1
-            Mtmp = Mtmp @ self.mat_adj # numpy.matmul.html#numpy.matmul
-            Puissances.append(Mtmp)
-        # somme puissances, comp bool, conversion en int la plus simple
-        self.mat_ferm_transitive = (sum(Puissances) > 0).view(dtype=uint8)
-        # Xavier: insertion de la mat de ferm. transit au début
-        Puissances.insert(0, self.mat_ferm_transitive)
-        self.Matrices = Puissances
-        #Puissances_latex =[ latex(Matrix(M),mat_delim='(') for M in Puissances ]
-        self.Matrices_latex = [ mat2tex(M) for M in Puissances ]
-        ## tableaux latex pour les prédécesseurs et les successeurs:
-        self.tab_latex_pred = tab_latex(self.predecesseurs, True)
-        self.tab_latex_succ = tab_latex(self.successeurs, False)
+            self.successeurs = self._dict_voisins(self._succ_csr)
+
+    # après GrapheMPM.load, les structures par sommet ne sont reconstruites
+    # qu'au premier accès, depuis les tableaux chargés
+    @cached_property
+    def _noms(self):
+        octets, fins = self._noms_brut
+        b, fins = octets.tobytes(), fins.tolist()
+        return [b[i:j].decode("utf-8") for i, j in zip([0] + fins[:-1], fins)]
+
+    @cached_property
+    def _index(self):
+        return {k: i for i, k in enumerate(self._noms)}
+
+    @cached_property
+    def num_sommets(self):
+        return dict(zip(range(1, len(self._noms)+1), self._noms))
+
+    @cached_property
+    def successeurs(self):
+        return self._dict_voisins(self._succ_csr)
+
+    @cached_property
+    def predecesseurs(self):
+        return self._dict_voisins(self._pred_csr)
+
+    def _build_sparse(self, D, direct):
+        """construire les listes d'adjacence CSR en O(V+E) depuis un dict.
+
+        :param D: dict des successeurs (direct) ou des prédécesseurs
+        :param direct: True si D est le dict des successeurs
+        """
+        src, dst = [], []
+        for k, v in D.items():
+            i = self._index[k]
+            J = _voisins(v, self._index)
+            src.extend([i]*len(J))
+            dst.extend(J)
+        if not direct:
+            src, dst = dst, src
+        N = len(self._noms)
+        self._succ_csr = _csr(N, src, dst)
+        self._pred_csr = _csr(N, dst, src)
+
+    def _build_sparse_from_dense(self):
+        """construire les listes d'adjacence CSR depuis self._mat_adj
+        """
+        src, dst = nonzero(self._mat_adj)
+        N = len(self._noms)
+        self._succ_csr = _csr(N, src, dst)
+        self._pred_csr = _csr(N, dst, src)
+
+    def _octets_adjacence(self):
+        """taille en octets des listes d'adjacence et de la matrice dense
+        éventuelle
+        """
+        n = sum(T.nbytes for T in self._succ_csr + self._pred_csr)
+        return n + (0 if self._mat_adj is None else self._mat_adj.nbytes)
+
+    def _dict_voisins(self, csr):
+        """dict nom -> liste des noms voisins, à partir d'un stockage CSR
+        """
+        indptr, indices = csr
+        ptr, ind, noms = indptr.tolist(), indices.tolist(), self._noms
+        return {noms[i]: [noms[j] for j in ind[ptr[i]:ptr[i+1]]]
+                for i in range(len(noms))}
+
+    @property
+    def mat_adj(self):
+        """matrice d'adjacence dense (numpy.array), matérialisée au premier
+        accès en mode creux
+        """
+        if self._mat_adj is None:
+            with _phase("adjacence.dense") as ph:
+                indptr, indices = self._succ_csr
+                N = len(self._noms)
+                M = zeros((N, N), dtype=int_)
+                M[repeat(arange(N), diff(indptr)), indices] = 1
+                self._mat_adj = M
+                ph.noter(octets=M.nbytes)
+        return self._mat_adj
+
+    def _invalider(self):
+        """oublier les calculs qui dépendent de la structure du graphe
+        """
+        self._mat_adj = None
+        self._topo = self._bits = self._bits_pred = self._ferm = None
+        self._reduction = None
+        self._matrices = _Puissances(self)
+        self._matrices_latex = _Puissances(self, latex=True)
+        self._tab_latex = {}
+
+    def _modifier_arc(self, i, j, ajout):
+        """ajouter (ajout=True) ou retirer l'arc i -> j: listes d'adjacence,
+        entrées des dictionnaires successeurs/prédécesseurs et caches
+        """
+        self._succ_csr = _csr_modifie(self._succ_csr, i, j, ajout)
+        self._pred_csr = _csr_modifie(self._pred_csr, j, i, ajout)
+        noms = self._noms
+        for k, D, (indptr, indices) in [(i, self.successeurs, self._succ_csr),
+                                        (j, self.predecesseurs, self._pred_csr)]:
+            D[noms[k]] = [noms[v] for v in
+                          indices[indptr[k]:indptr[k+1]].tolist()]
+        self._invalider()
+
+    def _ordre(self):
+        """(niv, ordre) du tri topologique par couches, mis en cache
+        """
+        if self._topo is None:
+            with _phase("setlevel.kahn") as ph:
+                self._topo = _kahn(self._succ_csr, self._pred_csr)
+                niv = self._topo[0]
+                ph.noter(iterations=int(niv.max()) + 1 if len(niv) else 0,
+                         octets=niv.nbytes + self._topo[1].nbytes)
+        return self._topo
+
+    def _circuit(self):
+        """noms des sommets d'un circuit (le premier répété à la fin), ou
+        None si le graphe est sans circuit.
+
+        les sommets non atteints par le tri topologique ont tous un
+        prédécesseur lui aussi non atteint: en remontant ces prédécesseurs
+        on finit par boucler.
+        """
+        niv = self._ordre()[0]
+        bloques = nonzero(niv < 0)[0]
+        if len(bloques) == 0:
+            return None
+        pptr, pind = self._pred_csr
+        chemin, vus = [], {}
+        v = int(bloques[0])
+        while v not in vus:
+            vus[v] = len(chemin)
+            chemin.append(v)
+            P = pind[pptr[v]:pptr[v+1]]
+            v = int(P[niv[P] < 0][0])
+        C = chemin[vus[v]:] + [v]
+        return [self._noms[k] for k in reversed(C)]
+
+    def _niveaux(self):
+        """dict nom du sommet -> niveau, par le tri topologique par couches
+
+        :raises CircuitError: si le graphe comporte un circuit
+        """
+        with _phase("setlevel"):
+            niv, ordre = self._ordre()
+            if len(ordre) < len(self._noms):
+                raise CircuitError(self._circuit())
+            noms = self._noms
+            return {noms[i]: n for i, n in zip(ordre.tolist(),
+                                               niv[ordre].tolist())}
+
+    def _fermeture_bits(self):
+        """bitsets de la fermeture transitive, mis en cache
+        """
+        if self._bits is None:
+            ordre = self._ordre()[1]
+            with _phase("fermeture") as ph:
+                self._bits = _bits_fermeture(self._succ_csr, ordre)
+                ph.noter(octets=self._bits.nbytes)
+        return self._bits
+
+    def _fermeture_bits_pred(self):
+        """bitsets de la fermeture transitive du graphe inverse (la ligne j
+        code les ancêtres de j), mis en cache
+        """
+        if self._bits_pred is None:
+            # l'ordre topologique inverse convient au graphe inverse
+            ordre = self._ordre()[1][::-1]
+            with _phase("fermeture") as ph:
+                self._bits_pred = _bits_fermeture(self._pred_csr, ordre)
+                ph.noter(octets=self._bits_pred.nbytes)
+        return self._bits_pred
+
+    def _noms_bits(self, ligne):
+        """noms des sommets dont le bit vaut 1 dans une ligne de bitsets
+        """
+        B = unpackbits(ligne.astype("<u8").view(uint8), count=len(self._noms),
+                       bitorder="little")
+        noms = self._noms
+        return [noms[k] for k in nonzero(B)[0].tolist()]
+
+    def reaches(self, a, b):
+        """tester si b est accessible depuis a par un chemin non vide,
+        autrement dit si la tâche b dépend, même indirectement, de a.
+
+        la première requête construit l'index (bitsets de la fermeture
+        transitive, N²/8 octets), les suivantes sont en temps constant.
+
+        :rtype: bool
+        """
+        i, j = self._index[a], self._index[b]
+        mot = int(self._fermeture_bits()[i, j >> 6])
+        return bool((mot >> (j & 63)) & 1)
+
+    def descendants(self, x):
+        """noms des sommets accessibles depuis x par un chemin non vide (x
+        lui-même s'il est sur un circuit), dans l'ordre de num_sommets
+
+        :rtype: list
+        """
+        return self._noms_bits(self._fermeture_bits()[self._index[x]])
+
+    def ancestors(self, x):
+        """noms des sommets depuis lesquels x est accessible par un chemin
+        non vide, dans l'ordre de num_sommets
+
+        :rtype: list
+        """
+        return self._noms_bits(self._fermeture_bits_pred()[self._index[x]])
+
+    @property
+    def mat_ferm_transitive(self):
+        """matrice de fermeture transitive (numpy.array de uint8), dépliée
+        depuis les bitsets
+        """
+        if self._ferm is None:
+            R = self._fermeture_bits()
+            self._ferm = unpackbits(R.astype("<u8").view(uint8), axis=1,
+                                    count=len(self._noms), bitorder="little")
+        return self._ferm
+
+    @property
+    def Matrices(self):
+        """vue paresseuse des puissances de mat_adj, précédées de la
+        fermeture transitive
+        """
+        return self._matrices
+
+    @property
+    def Matrices_latex(self):
+        """vue paresseuse des exports latex pmatrix de Matrices
+        """
+        return self._matrices_latex
+
+    @property
+    def tab_latex_pred(self):
+        """str du tableau latex des prédécesseurs
+        """
+        if "pred" not in self._tab_latex:
+            self._tab_latex["pred"] = tab_latex(self.predecesseurs, True)
+        return self._tab_latex["pred"]
+
+    @property
+    def tab_latex_succ(self):
+        """str du tableau latex des successeurs
+        """
+        if "succ" not in self._tab_latex:
+            self._tab_latex["succ"] = tab_latex(self.successeurs, False)
+        return self._tab_latex["succ"]
+
+    def _arcs_reduits(self):
+        """(src, dst) des arcs de la réduction transitive, en cache
+
+        :raises CircuitError: si le graphe comporte un circuit
+        """
+        if self._reduction is None:
+            if not self.has_no_circuit():
+                raise CircuitError(self._circuit())
+            indptr, indices = self._succ_csr
+            with _phase("reduction") as ph:
+                garde = _reduction_transitive(self._succ_csr,
+                                              self._fermeture_bits())
+                src = repeat(arange(len(self._noms)), diff(indptr))
+                self._reduction = (src[garde], indices[garde])
+                ph.noter(aretes=len(indices) - int(garde.sum()))
+        return self._reduction
+
+    def transitive_reduction(self):
+        """réduction transitive: le plus petit ensemble d'arcs qui conserve
+        les mêmes accessibilités (un arc a -> c est retiré s'il existe déjà
+        un chemin a -> b -> … -> c).
+
+        calculée en une passe sur les bitsets de la fermeture transitive,
+        voir reaches; makeGraphviz(reduction=True) n'affiche que ces arcs.
+
+        :returns: dict des successeurs du graphe réduit
+        :rtype: dict
+        :raises CircuitError: si le graphe comporte un circuit
+
+        Exemple::
+
+        >>> G = GrapheSimple(pred={"A": "", "B": "A", "C": "AB"})
+        >>> G.transitive_reduction()
+        {'A': ['B'], 'B': ['C'], 'C': []}
+        """
+        src, dst = self._arcs_reduits()
+        return self._dict_voisins(_csr(len(self._noms), src, dst))
 
     def has_no_circuit(self):
         """tester si le graphe est sans circuit
 
         :rtype: bool
         """
-        return self.mat_ferm_transitive.trace() == 0 #diagonal().sum()
+        # tous les sommets sont atteints par le tri topologique
+        return len(self._ordre()[1]) == len(self._noms)
+
+    # en-tête de la source DOT: commentaire et forme des nœuds
+    _dot_entete = ("graphe orienté simple", "ellipse")
+
+    def _corps_dot(self, fermeture=False, reduction=False):
+        """lignes du corps de la source DOT (Digraph.body), construites en
+        une passe sur les listes d'arcs
+
+        :returns: (lignes, nombre d'arcs)
+        """
+        if fermeture and reduction:
+            raise ValueError("fermeture et reduction sont incompatibles")
+        noms = self._noms
+        N = len(noms)
+        indptr, indices = self._succ_csr
+        E = [_dot_extremite(k) for k in noms]
+        L = ["\tgraph [rankdir=LR]\n"]
+        L += [f"\t{_dot_id(k)}\n" for k in self.successeurs]
+        if fermeture:
+            # à méditer: arc noir si on n'est pas dans la fermeture tr.
+            src, dst = nonzero(self.mat_ferm_transitive)
+            arcs = set((repeat(arange(N), diff(indptr))*N + indices).tolist())
+            L += [f"\t{E[i]} -> {E[j]} [color="
+                  f"{'black' if i*N + j in arcs else 'red'}]\n"
+                  for i, j in zip(src.tolist(), dst.tolist())]
+        else:
+            # un arc est toujours dans la fermeture transitive: noir
+            if reduction:
+                src, indices = self._arcs_reduits()
+            else:
+                src = repeat(arange(N), diff(indptr))
+            L += [f"\t{E[i]} -> {E[j]} [color=black]\n"
+                  for i, j in zip(src.tolist(), indices.tolist())]
+        return L, len(src)
+
+    def _graphviz(self, **options):
+        """construire self.gv à partir des lignes de _corps_dot
+        """
+        from graphviz import Digraph
+        commentaire, forme = self._dot_entete
+        with _phase("makeGraphviz") as ph:
+            L, arcs = self._corps_dot(**options)
+            dot = Digraph(comment=commentaire, node_attr={"shape": forme},
+                          body=L)
+            dot.format = "png"
+            dot.engine = self._moteur(**options)
+            ph.noter(noeuds=len(self._noms), aretes=arcs)
+        self.gv = dot
+
+    def _moteur(self, **options):
+        """moteur de mise en page graphviz adapté aux options de rendu
+        """
+        return "dot"
 
-    def makeGraphviz(self, fermeture=False):
+    def makeGraphviz(self, fermeture=False, reduction=False):
         """générer l'objet graphviz
 
         :rtype: None
         :param fermeture: indique si on relie avec la fermeture
         transitive
         :type fermeture: bool
+        :param reduction: n'afficher que les arcs de la réduction
+        transitive (graphe sans circuit)
+        :type reduction: bool
         """
-        dot = Digraph(comment="graphe orienté simple",
-                      node_attr={"shape":"ellipse"})
-        dot.attr("graph", rankdir="LR")
-        dot.format = "png"
-
-        for k in self.successeurs.keys():
-            dot.node(k)
-
-        choix = {True: self.mat_ferm_transitive, False: self.mat_adj}
-        N = len(self.successeurs) #nb de sommets
-        for i in range(N):
-            for j in range(N):
-                if choix[fermeture][i, j]:
-                    # à méditer: arc noir si on n'est pas dans la fermeture tr.
-                    couleur = ('black' if choix[not fermeture][i,j] else 'red')
-                    dot.edge(self.num_sommets[i+1],
-                         self.num_sommets[j+1], color=couleur)
-        self.gv = dot
+        self._graphviz(fermeture=fermeture, reduction=reduction)
+
+    def write_dot(self, flux=None, **options):
+        """écrire la source DOT (le texte de self.gv.source après
+        makeGraphviz) directement dans un flux, sans passer par graphviz.
+
+        :param flux: flux texte (fichier ouvert, io.StringIO…); si None, la
+            source est renvoyée sous forme de str
+        :param options: comme pour makeGraphviz (fermeture=…)
+
+        Exemple::
+
+        >>> with open("ex.gv", "w", encoding="utf-8") as f:
+        ...     G.write_dot(f)
+        """
+        commentaire, forme = self._dot_entete
+        with _phase("write_dot") as ph:
+            L, arcs = self._corps_dot(**options)
+            entete = (f"// {commentaire}\n", "digraph {\n",
+                      f"\tnode [shape={_dot_id(forme)}]\n")
+            ph.noter(noeuds=len(self._noms), aretes=arcs)
+            if flux is None:
+                return "".join(entete) + "".join(L) + "}\n"
+            flux.writelines(entete)
+            flux.writelines(L)
+            flux.write("}\n")
+
+    async def arender(self, format="png", engine=None, timeout=60,
+                      semaphore=None, **options):
+        """équivalent asynchrone de makeGraphviz puis render: la source DOT
+        est produite par write_dot puis rendue par un sous-processus
+        graphviz sans bloquer la boucle asyncio, voir
+        grapheMPM.rendu.arendre (limite de rendus simultanés, délai).
+
+        :param format: format de sortie (png, svg, pdf…)
+        :param engine: moteur graphviz (celui de makeGraphviz par défaut)
+        :param timeout: délai maximal du rendu en secondes
+        :param semaphore: asyncio.Semaphore limitant les rendus simultanés
+        :param options: comme pour makeGraphviz (reduction=…, resume=…)
+        :returns: le rendu
+        :rtype: bytes
+
+        Exemple::
+
+        >>> svg = await G.arender("svg", timeout=10)
+        """
+        from .rendu import arendre
+        source = self.write_dot(**options)
+        return await arendre(source, format, engine or self._moteur(**options),
+                             timeout=timeout, semaphore=semaphore)
+
+    def _lignes_matrice(self, m):
+        """lignes (listes d'entiers) d'une matrice de write_latex, produites
+        une à une: l'adjacence depuis les listes CSR, la fermeture depuis
+        les bitsets, sans matrice dense
+        """
+        N = len(self._noms)
+        if m == "adjacence":
+            indptr, indices = self._succ_csr
+            for i in range(N):
+                L = [0]*N
+                for j in indices[indptr[i]:indptr[i+1]].tolist():
+                    L[j] = 1
+                yield L
+        elif m == "fermeture":
+            for r in self._fermeture_bits():
+                yield unpackbits(r.astype("<u8").view(uint8), count=N,
+                                 bitorder="little").tolist()
+        else:
+            yield from (r.tolist() for r in self.Matrices[m])
+
+    def write_latex(self, flux=None, matrices=("adjacence",),
+                    tableaux=("pred", "succ")):
+        """écrire les exports latex (pmatrix, tableaux des prédécesseurs et
+        successeurs) directement dans un flux, ligne par ligne: la mémoire
+        utilisée ne dépend pas de la taille du texte produit.
+
+        :param flux: flux texte (fichier ouvert, io.StringIO…); si None, le
+            texte est renvoyé sous forme de str
+        :param matrices: matrices à écrire: "adjacence", "fermeture" (sans
+            matrice dense) ou k pour la puissance Matrices[k]
+        :param tableaux: tableaux à écrire, parmi "pred" et "succ"
+        :returns: None, ou le texte si flux est None
+
+        Exemple::
+
+        >>> with open("polycopie.tex", "w", encoding="utf-8") as f:
+        ...     G.write_latex(f, matrices=["adjacence", 2, "fermeture"])
+        """
+        if flux is None:
+            f = io.StringIO()
+            self.write_latex(f, matrices, tableaux)
+            return f.getvalue()
+        with _phase("latex") as ph:
+            for m in matrices:
+                _ecrire_lignes_pmatrix(self._lignes_matrice(m), flux)
+                flux.write("\n\n")
+            for t in tableaux:
+                ecrire_tab_latex({"pred": self.predecesseurs,
+                                  "succ": self.successeurs}[t],
+                                 t == "pred", flux)
+                flux.write("\n")
+            ph.noter(lignes=len(self._noms)*(len(matrices) + len(tableaux)))
+
+    def render(self, filename=None, directory=None, format=None, engine=None,
+               cleanup=False, cache=None):
+        """comme self.gv.render, mais graphviz n'est lancé que si le même
+        rendu (source DOT, format, moteur) n'est pas déjà dans le cache sur
+        disque, voir grapheMPM.rendu.CacheRendu
+
+        :returns: chemin du fichier image
+        """
+        from .rendu import rendre
+        return rendre(self.gv, filename, directory=directory, format=format,
+                      engine=engine, cleanup=cleanup, cache=cache)
 
 
 class GrapheSimpleNoCircuit(GrapheSimple):
@@ -302,76 +1235,36 @@ class GrapheSimpleNoCircuit(GrapheSimple):
     Il suffit de rajouter des groupements syntaxiques de nœuds sans utiliser
     les subgraphs (qui font des résultats étranges).
     """
-    def __init__(self, succ=None, pred=None, make_node=str):
+    def __init__(self, succ=None, pred=None, make_node=str, sparse=False):
         GrapheSimple.__init__(self, succ=succ, pred=pred,
-                              make_node=make_node)
+                              make_node=make_node, sparse=sparse)
         if self.has_no_circuit():
             self.setlevel()
-
-    def _col_is_null(self, M, i):
-        """la colonne i de M est-elle nulle?
-        """
-        return sum(M[:, i]) == 0
     
     def setlevel(self):
-        """calculer les niveaux des sommets
+        """calculer les niveaux des sommets en O(V+E) (tri topologique par
+        couches): le niveau d'un sommet est la longueur du plus long chemin
+        qui y mène.
 
         créer un attribut self.niveaux de type dict.
         clé, valeur: nom du sommet, niveau
         :rtype: None
+        :raises CircuitError: si le graphe comporte un circuit
         """
-        A = self.mat_adj.copy()
-        L = [(i+1) for i in range(len(A)) if self._col_is_null(A, i)]
-        c = 0 # compteur de niveau
-        D = {} # dico des niveaux
-        for e in L: # mise à jour niveau 0
-            D[e] = c
-        while len(D) < len(A):
-            c += 1
-            A = A @ self.mat_adj
-            M = L
-            L = [(i+1) for i in range(len(A)) if self._col_is_null(A, i)]
-            # calcul des nv sommets sans pred
-            delta = set(L).difference(set(M))
-            for e in delta: # mise à jour niveau c
-                D[e] = c
-        D1 = [(self.num_sommets[k], v) for k, v in D.items()]
-        self.niveaux = dict(D1)
-
-    def makeGraphviz(self, fermeture=False):
-        """générer l'objet graphviz
+        self.niveaux = self._niveaux()
 
-        :rtype: None
-        :param fermeture: indique si on relie avec la fermeture
-        transitive
-        :type fermeture: bool
+    def _corps_dot(self, fermeture=False, reduction=False):
+        """lignes du corps DOT, avec les groupes par niveaux
         """
-        dot = Digraph(comment="graphe orienté simple",
-                      node_attr={"shape":"ellipse"})
-        dot.attr("graph", rankdir="LR")
-        dot.format = "png"
-
-        for k in self.successeurs.keys():
-            dot.node(k)
-
-        choix = {True: self.mat_ferm_transitive, False: self.mat_adj}
-        N = len(self.successeurs) #nb de sommets
-        for i in range(N):
-            for j in range(N):
-                if choix[fermeture][i, j]:
-                    # à méditer: arc noir si on n'est pas dans la fermeture tr.
-                    couleur = ('black' if choix[not fermeture][i,j] else 'red')
-                    dot.edge(self.num_sommets[i+1],
-                         self.num_sommets[j+1], color=couleur)
-        # ajout des groupes par niveaux
-        # au plus N niveaux où N est le nb de sommets
+        L, arcs = GrapheSimple._corps_dot(self, fermeture, reduction)
         if self.has_no_circuit():
-            NIV = [[e for e in self.niveaux if self.niveaux[e] == n] for n in range(N)]
-            for e in NIV:
-                if len(e) > 0:
-                    dot.body.append(f"{{rank=same; {' '.join(e)}}}")
-        self.gv = dot
-        
+            groupes = {}
+            for e, n in self.niveaux.items():
+                groupes.setdefault(n, []).append(e)
+            L += [f"{{rank=same; {' '.join(groupes[n])}}}"
+                  for n in sorted(groupes)]
+        return L, arcs
+
 
 class GrapheMPM(GrapheSimple):
     """Classe de génération d'un graphe d'ordonnancement par les
@@ -396,11 +1289,28 @@ class GrapheMPM(GrapheSimple):
     >>> G.gv.render("ex-full")
     >>> G.gv.format = "svg"
     >>> G.gv.render("ex-full")
+
+    Les dates sont calculées sur des numpy.array indexés comme les sommets
+    (ordre de num_sommets): G.ed, G.ld, G.ml, G.mt. Les étiquettes des
+    nœuds (noeud.data) ne sont mises à jour qu'au moment de makeGraphviz.
+
+    Les calculs se font en virgule fixe: durées et dates sont des entiers
+    (int64) d'unité 10**-prec (prec ≤ _PREC_MAX, les durées plus fines sont
+    arrondies), exacts tant que la somme des durées tient dans un int64
+    (ValueError sinon). G.ed… les donnent en valeurs réelles (float64 si prec > 0), _pretty ne les met en
+    forme qu'à l'affichage.
+
+    Le dictionnaire G.ponderation reste modifiable: earliestdate et
+    latestdate relisent ses durées avant de calculer (update_duration évite
+    ce recalcul complet en ne mettant à jour que les dates concernées).
+
+    >>> G.ed[G._index["fin"]] # durée minimale du projet
+    27
     """
 
     def __init__(self, succ=None, pred=None, pond=None, presentation=1,
                  titre_debut="début", titre_fin="fin", show_level=False,
-                 marges=False):
+                 marges=False, sparse=False):
         """instanciation d'un graphe MPM
 
         2 possibilités d'initialisation avec l'un des dictionnaires
@@ -416,148 +1326,789 @@ class GrapheMPM(GrapheSimple):
         :type marges: bool
         :param show_level: afficher les niveaux au dessus de chaque cluster
         :type show_level: bool
+        :param sparse: construction creuse, voir GrapheSimple
+        :type sparse: bool
 
         """
         # calcul du nombre de chiffres max après la virgule pour arrondir
-        # ensuite
-        self.prec = max([len(str(v).partition(".")[2])
-                         for v in pond.values()])
+        # ensuite (au plus _PREC_MAX)
+        self.prec = max([_decimales(v) for v in pond.values()])
         self.ponderation = {k: self._nb(str(e)) for (k, e) in pond.items()}
 
         self.titre_debut = titre_debut
         self.titre_fin = titre_fin
         self.show_level = show_level
 
+        self._presentation, self._marges = presentation, marges
         make_node = lambda x: noeud(x, presentation=presentation,
                                     marges=marges)
-        # 1ere passe
-        GrapheSimple.__init__(self, succ=succ, pred=pred,
-                              make_node=make_node)
-        # ajouter le nœud de fin dans les algorithmes
-        # il faut lui relier tous les nœuds sans successeur
-        pred_full = self.predecesseurs
-        pred_full["fin"] = [e for e, s in self.successeurs.items()
-                            if s in ['', []]]
+        # une seule construction du graphe, puis ajout du nœud de fin
         self.ponderation["fin"] = self._nb(str(0)) # poids nul pour "fin"
-        # 2ieme passe
-        GrapheSimple.__init__(self, pred=pred_full,
-                              make_node=make_node)
+        GrapheSimple.__init__(self, succ=succ, pred=pred,
+                              make_node=make_node, sparse=sparse)
+        self._ajouter_fin(make_node, ordre_alpha=bool(succ))
         self.setlevel()
+        self._plan = None
+        # durées rangées comme les sommets, en virgule fixe
+        pond = dict(pond, fin=0)
+        D = [_virgule_fixe(pond[k], self.prec) for k in self._noms]
+        _verifier_capacite(sum(map(abs, D)), self.prec)
+        self._durees = asarray(D, dtype=int64)
+        self._pond_lue = dict(self.ponderation) # état reporté dans _durees
+        self._ed = self._ld = self._ml = self._mt = None
+        self._affiche = set() # champs des nœuds affichés
+        self._sales = set() # indices des nœuds à synchroniser (None: tous)
+
+    def _ajouter_fin(self, make_node, ordre_alpha):
+        """ajouter le sommet fin, relié à tous les nœuds sans successeur,
+        au graphe qui vient d'être construit: les listes d'adjacence sont
+        renumérotées et complétées, sans reconstruire les nœuds ni toucher
+        aux dictionnaires fournis.
+
+        les sommets sans successeur sont lus sur self.successeurs, donc avec
+        la règle de lecture du mode (sous-chaîne en mode dense, caractère
+        par caractère en mode creux).
+
+        :param ordre_alpha: ranger self.sommets dans l'ordre alphabétique
+            (construction depuis succ), sinon garder l'ordre des clés
+        """
+        finales = [e for e, s in self.successeurs.items() if s in ['', []]]
+        noms = self._noms
+        p = bisect_left(noms, "fin")
+        N = len(noms) + 1
+        indptr, indices = self._succ_csr
+        # renumérotation: les sommets après fin sont décalés d'un rang
+        ancien = arange(N - 1)
+        nouveau = ancien + (ancien >= p)
+        src = nouveau[repeat(ancien, diff(indptr))]
+        dst = nouveau[indices]
+        I = nouveau[[self._index[e] for e in finales]]
+        src = concatenate([src, I])
+        dst = concatenate([dst, full(len(I), p, dtype=int64)])
+        self._noms = noms[:p] + ["fin"] + noms[p:]
+        self._index = {k: i for i, k in enumerate(self._noms)}
+        self.num_sommets = dict(zip(range(1, N+1), self._noms))
+        self._succ_csr = _csr(N, src, dst)
+        self._pred_csr = _csr(N, dst, src)
+        self._mat_adj = None # matérialisée au premier accès
+        cles = noms if ordre_alpha else self.sommets
+        self.sommets = {k: self.sommets[k] for k in cles}
+        self.sommets["fin"] = make_node("fin")
+        pred = dict(self.predecesseurs)
+        pred["fin"] = finales
+        self.predecesseurs = pred
+        self.successeurs = self._dict_voisins(self._succ_csr)
+        self._invalider()
+
+    @cached_property
+    def sommets(self):
+        return {k: noeud(k, presentation=self._presentation,
+                         marges=self._marges) for k in self._noms}
+
+    @cached_property
+    def niveaux(self):
+        niv = self._ordre()[0] # _topo est oublié après _invalider
+        return dict(zip(self._noms, niv.tolist()))
+
+    @cached_property
+    def ponderation(self):
+        P = {k: self._nb(self._pretty(v))
+             for k, v in zip(self._noms, self._durees.tolist())}
+        self._pond_lue = dict(P)
+        return P
+
+    @property
+    def _echelle(self):
+        """unité des durées et dates en virgule fixe: 10**prec
+        """
+        return 10**self.prec
 
-    def makeGraphviz(self):
+    def _reel(self, T):
+        """array en virgule fixe -> valeurs réelles (inchangé si prec = 0)
+        """
+        if T is None or self.prec == 0:
+            return T
+        return T / self._echelle
+
+    @property
+    def ed(self):
+        """dates au plus tôt (numpy.array rangé comme num_sommets)"""
+        return self._reel(self._ed)
+
+    @property
+    def ld(self):
+        """dates au plus tard"""
+        return self._reel(self._ld)
+
+    @property
+    def ml(self):
+        """marges libres"""
+        return self._reel(self._ml)
+
+    @property
+    def mt(self):
+        """marges totales"""
+        return self._reel(self._mt)
+
+    @classmethod
+    def _depuis_arcs(cls, noms, src, dst, durees, prec, presentation=1,
+                     titre_debut="début", titre_fin="fin", show_level=False,
+                     marges=False):
+        """construire un GrapheMPM (mode creux) directement depuis des
+        tableaux d'arcs, les noms étant internés en entiers: le sommet fin
+        est ajouté d'emblée et chaque structure n'est construite qu'une
+        fois; les dictionnaires par sommet sont construits à la demande.
+
+        :param noms: liste des noms des tâches (indice = identifiant)
+        :param src: array des identifiants des prédécesseurs
+        :param dst: array des identifiants des tâches qui en dépendent
+        :param durees: array des durées en virgule fixe (entiers d'unité
+            10**-prec), rangées comme noms
+        :param prec: nombre de chiffres après la virgule des durées
+        :raises CircuitError: si le graphe comporte un circuit
+        :raises ValueError: si la somme des durées dépasse un int64
+        """
+        if "fin" in noms:
+            raise ValueError("le nom de tâche fin est réservé")
+        tous = list(noms) + ["fin"]
+        N = len(tous)
+        # renumérotation dans l'ordre alphabétique des noms
+        ordre = sorted(range(N), key=tous.__getitem__)
+        rang = zeros(N, dtype=int64)
+        rang[ordre] = arange(N)
+        src = rang[asarray(src, dtype=int64)]
+        dst = rang[asarray(dst, dtype=int64)]
+        fin = int(rang[-1])
+        # les tâches sans successeur précèdent fin
+        finales = nonzero(bincount(src, minlength=N) == 0)[0]
+        finales = finales[finales != fin]
+        src = concatenate([src, finales])
+        dst = concatenate([dst, full(len(finales), fin, dtype=int64)])
+        durees = asarray(durees, dtype=int64)
+        _verifier_capacite(float(absolute(durees).sum(dtype=float64)), prec)
+        D = zeros(N, dtype=int64)
+        D[rang[:-1]] = durees
+
+        G = cls.__new__(cls)
+        G.sparse = True
+        G._invalider()
+        G._noms = [tous[k] for k in ordre]
+        with _phase("adjacence") as ph:
+            G._succ_csr = _csr(N, src, dst)
+            G._pred_csr = _csr(N, dst, src)
+            ph.noter(octets=G._octets_adjacence())
+        if not G.has_no_circuit():
+            raise CircuitError(G._circuit())
+        G.prec = prec
+        G._durees = D
+        G._presentation, G._marges = presentation, marges
+        G.titre_debut, G.titre_fin = titre_debut, titre_fin
+        G.show_level = show_level
+        G._ed = G._ld = G._ml = G._mt = None
+        G._affiche = set()
+        G._sales = set()
+        return G
+
+    # tableaux enregistrés par save, en plus des dates éventuelles
+    _TABLEAUX = ("noms", "noms_fins", "succ_indptr", "succ_indices",
+                 "pred_indptr", "pred_indices", "niv", "ordre", "durees")
+
+    def save(self, dossier):
+        """enregistrer le graphe et ses calculs dans un dossier: un fichier
+        .npy brut par tableau (noms en utf-8, listes d'adjacence CSR,
+        niveaux, durées et dates ed/ld/ml/mt si calculées, en virgule fixe)
+        et meta.json.
+
+        :param dossier: chemin du dossier (créé au besoin)
+        """
+        # durées modifiées dans self.ponderation: dates à refaire
+        if self._relire_ponderation() and self._ed is not None:
+            self._ordonnancer()
+        d = Path(dossier)
+        d.mkdir(parents=True, exist_ok=True)
+        noms = [k.encode("utf-8") for k in self._noms]
+        niv = asarray([self.niveaux[k] for k in self._noms], dtype=int64)
+        T = {"noms": frombuffer(b"".join(noms), dtype=uint8),
+             "noms_fins": cumsum([len(b) for b in noms], dtype=int64),
+             "succ_indptr": self._succ_csr[0],
+             "succ_indices": self._succ_csr[1],
+             "pred_indptr": self._pred_csr[0],
+             "pred_indices": self._pred_csr[1],
+             "niv": niv, "ordre": argsort(niv, kind="stable"),
+             "durees": self._durees}
+        dates = self._ed is not None
+        if dates:
+            T.update(ed=self._ed, ld=self._ld, ml=self._ml, mt=self._mt)
+        for k, v in T.items():
+            ecrire_npy(d / f"{k}.npy", asarray(v))
+        meta = {"format": 2, "prec": self.prec, "sparse": self.sparse,
+                "presentation": self._presentation, "marges": self._marges,
+                "titre_debut": self.titre_debut, "titre_fin": self.titre_fin,
+                "show_level": self.show_level, "dates": dates,
+                "affiche": sorted(self._affiche)}
+        (d / "meta.json").write_text(json.dumps(meta, ensure_ascii=False,
+                                                indent=1), encoding="utf-8")
+
+    @classmethod
+    def load(cls, dossier, mmap=True):
+        """recharger un graphe enregistré par save, sans aucun recalcul.
+
+        avec mmap=True les tableaux sont projetés en mémoire (copie sur
+        écriture): plusieurs processus partagent les mêmes pages et le
+        chargement est quasi instantané. Les dictionnaires (successeurs,
+        niveaux, sommets…) ne sont reconstruits qu'au premier accès.
+
+        :param dossier: chemin du dossier écrit par save
+        :param mmap: projeter les fichiers en mémoire plutôt que les lire
+        :rtype: GrapheMPM
+        """
+        d = Path(dossier)
+        meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != 2:
+            raise ValueError(f"format de graphe inconnu dans {d}")
+        noms = list(cls._TABLEAUX)
+        if meta["dates"]:
+            noms += ["ed", "ld", "ml", "mt"]
+        T = {k: lire_npy(d / f"{k}.npy", mmap_mode="c" if mmap else None)
+             for k in noms}
+        G = cls.__new__(cls)
+        G.sparse = meta["sparse"]
+        G._invalider()
+        G._noms_brut = (T["noms"], T["noms_fins"])
+        G._succ_csr = (T["succ_indptr"], T["succ_indices"])
+        G._pred_csr = (T["pred_indptr"], T["pred_indices"])
+        G._topo = (T["niv"], T["ordre"])
+        G._durees = T["durees"]
+        G.prec = meta["prec"]
+        G._presentation, G._marges = meta["presentation"], meta["marges"]
+        G.titre_debut, G.titre_fin = meta["titre_debut"], meta["titre_fin"]
+        G.show_level = meta["show_level"]
+        G._ed = G._ld = G._ml = G._mt = None
+        if meta["dates"]:
+            G._ed, G._ld, G._ml, G._mt = (T[k] for k in ("ed", "ld", "ml",
+                                                         "mt"))
+        G._affiche = set(meta["affiche"])
+        G._sales = None # nœuds neufs: tout est à recopier
+        return G
+
+    _dot_entete = ("graphe MPM", "plaintext")
+
+    def makeGraphviz(self, reduction=False, resume=False, voisinage=1,
+                     seuil=2000):
         """générer l'objet graphviz
 
         :rtype: None
+        :param reduction: n'afficher que les arcs de la réduction
+        transitive: les contraintes retirées sont déjà imposées par un
+        chemin, les dates sont inchangées
+        :type reduction: bool
+        :param resume: vue résumée des très grands graphes, voir
+        _corps_dot_resume (dates et marges sont calculées au besoin)
+        :type resume: bool
+        :param voisinage: en vue résumée, distance (en arcs) au chemin
+        critique des tâches affichées
+        :type voisinage: int
+        :param seuil: en vue résumée, au-delà de seuil tâches les nœuds
+        sont de simples étiquettes texte et le moteur est sfdp
+        :type seuil: int
+        """
+        self._graphviz(reduction=reduction, resume=resume,
+                       voisinage=voisinage, seuil=seuil)
+
+    def _moteur(self, resume=False, seuil=2000, **options):
+        """sfdp pour la vue résumée d'un graphe de plus de seuil tâches
+        """
+        return "sfdp" if resume and len(self._noms) > seuil else "dot"
+
+    def _corps_dot(self, reduction=False, resume=False, voisinage=1,
+                   seuil=2000):
+        """lignes du corps DOT: un sous-graphe par niveau, le nœud de
+        départ puis les arcs pondérés
+
+        :returns: (lignes, nombre d'arcs)
         """
-        dot = Digraph(comment="graphe MPM",
-                      node_attr={"shape":"plaintext"})
-        dot.attr("graph", rankdir="LR")
-        dot.format = "png"
-        # création des sous-graphes par niveau
-        NIVtmp = list(set(self.niveaux.values()))
-        NIV = sorted(NIVtmp)
+        if resume:
+            return self._corps_dot_resume(reduction, voisinage,
+                                          len(self._noms) > seuil)
+        self._synchroniser()
+        niveaux = self.niveaux
+        groupes = {} # niveau -> sommets, dans l'ordre de self.sommets
+        for k in self.sommets:
+            groupes.setdefault(niveaux[k], []).append(k)
+        NIV = sorted(groupes)
+        sommets = self.sommets
+        E = {k: _dot_extremite(k) for k in self.successeurs}
+        # sans « : » l'extrémité d'arc est l'identifiant du nœud
+        Q = {k: (e if ":" not in k else _dot_id(k)) for k, e in E.items()}
+        L = ["\tgraph [rankdir=LR]\n"]
         for N in NIV:
-            with dot.subgraph(name=f"cluster_{N}") as c: # style="invis",
-                titre = ((f"niv{N}" if N<NIV[-1] else "") if self.show_level
-                         else "")
-                c.attr(rank="same", label=titre,
-                       labelloc="u", penwidth="0")
-                for k, n in self.sommets.items(): # key, noeud
-                    if self.niveaux[k] == N:
-                        c.node(str(k), f"<{n.noeud}>")
-                        # la str html doit être encadrée de <>
+            # niv0, niv1… sont des identifiants DOT valides
+            titre = ((f"niv{N}" if N<NIV[-1] else '""') if self.show_level
+                     else '""')
+            L.append(f"\tsubgraph cluster_{N} {{\n"
+                     f"\t\tlabel={titre} labelloc=u penwidth=0 rank=same\n")
+            # la str html doit être encadrée de <>
+            L += [f"\t\t{Q[k]} [label=<{sommets[k].noeud}>]\n"
+                  for k in groupes[N]]
+            L.append("\t}\n")
 
         # branchement du nœud de départ:
-        dot.node("debut", self.titre_debut, shape='ellipse')
-        for k, n in self.sommets.items(): # key, noeud
-            if self.niveaux[k] == NIV[0]:
-                dot.edge("debut", k)
+        L.append(f"\tdebut [label={_dot_id(self.titre_debut)} "
+                 "shape=ellipse]\n")
+        L += [f"\tdebut -> {E[k]}\n" for k in groupes[NIV[0]]]
+        arcs = len(groupes[NIV[0]])
 
         # création des autres arcs, pondérés
-        for k, L in self.successeurs.items():
-            for i in list(L):
-                dot.edge(k, i, label=str(self.ponderation[k]),
-                         tailport="here", headport="here") # from to
-        self.gv = dot
+        etiquettes = {} # durée (str) -> fin de ligne des arcs
+        successeurs = (self.transitive_reduction() if reduction
+                       else self.successeurs)
+        for k, S in successeurs.items():
+            w = str(self.ponderation[k])
+            fin = etiquettes.get(w)
+            if fin is None:
+                fin = etiquettes[w] = (f" [label={_dot_id(w)} "
+                                       "headport=here tailport=here]\n")
+            L += [f"\t{E[k]} -> {E[i]}{fin}" for i in S]
+            arcs += len(S)
+        return L, arcs
+
+    def _critiques_voisins(self, voisinage):
+        """masque des tâches du chemin critique (marge totale nulle) et de
+        celles à au plus voisinage arcs (dans un sens ou dans l'autre)
+        """
+        garde = self._mt == 0
+        F = nonzero(garde)[0]
+        for _ in range(voisinage):
+            V = concatenate([csr[1][_plages(csr[0], F)]
+                             for csr in (self._succ_csr, self._pred_csr)])
+            F = _distincts(V[~garde[V]])
+            if len(F) == 0:
+                break
+            garde[F] = True
+        return garde
+
+    def _corps_dot_resume(self, reduction, voisinage, simple):
+        """lignes du corps DOT de la vue résumée: chemin critique et
+        voisinage détaillés, les autres tâches regroupées par niveau en un
+        nœud « n tâches, marges a à b »; les arcs touchant un regroupement
+        sont fusionnés et en pointillés.
+
+        :param simple: étiquettes texte au lieu des tableaux html, sans
+            sous-graphes par niveau
+        :returns: (lignes, nombre d'arcs)
+        """
+        # marges nécessaires aux regroupements; les nœuds détaillés
+        # n'affichent que les champs demandés par earliestdate/latestdate
+        if self._relire_ponderation() or self._mt is None:
+            self._ordonnancer()
+        noms, N = self._noms, len(self._noms)
+        niv = self._ordre()[0]
+        garde = self._critiques_voisins(voisinage)
+        # groupe d'affichage: la tâche elle-même ou N + son niveau
+        groupe = where(garde, arange(N), N + niv)
+        autres = nonzero(~garde)[0]
+        nb = bincount(niv[autres], minlength=int(niv.max()) + 1)
+        mini = full(len(nb), self._mt.max(), dtype=int64)
+        maxi = zeros(len(nb), dtype=int64)
+        minimum.at(mini, niv[autres], self._mt[autres])
+        maximum.at(maxi, niv[autres], self._mt[autres])
+
+        # extrémités d'arcs DOT des groupes affichés
+        E = [None]*(N + len(nb))
+        for i in nonzero(garde)[0].tolist():
+            E[i] = _dot_extremite(noms[i])
+        for n in nonzero(nb)[0].tolist():
+            E[N + n] = _dot_id(f"résumé_{n}")
+
+        def resume(n):
+            a, b = self._pretty(mini[n]), self._pretty(maxi[n])
+            marges = f"marge {a}" if a == b else f"marges {a} à {b}"
+            # \\n: retour à la ligne dans une étiquette DOT
+            s = "s" if nb[n] > 1 else ""
+            etiquette = _dot_id(f"{nb[n]} tâche{s}\\n{marges}")
+            return (f"\t{E[N + n]} [label={etiquette} shape=box "
+                    'style="rounded,dashed"]\n')
+
+        def tache(i):
+            k = noms[i]
+            Q = E[i] if ":" not in k else _dot_id(k)
+            if simple:
+                ed, ld = self._pretty(self._ed[i]), self._pretty(self._ld[i])
+                etiquette = _dot_id(f"{k}\\n{ed} / {ld}")
+                return f"\t{Q} [label={etiquette} shape=box]\n"
+            return f"\t{Q} [label=<{self.sommets[k].noeud}>]\n"
+
+        if not simple:
+            self._synchroniser()
+        L = ["\tgraph [rankdir=LR]\n"]
+        gardes_niv = {}
+        for i in nonzero(garde)[0].tolist():
+            gardes_niv.setdefault(int(niv[i]), []).append(i)
+        for n in range(len(nb)):
+            lignes = [tache(i) for i in gardes_niv.get(n, [])]
+            if nb[n]:
+                lignes.append(resume(n))
+            if simple:
+                L += lignes
+            else:
+                titre = (f"niv{n}" if self.show_level and n < len(nb) - 1
+                         else '""')
+                L.append(f"\tsubgraph cluster_{n} {{\n"
+                         f"\t\tlabel={titre} labelloc=u penwidth=0 "
+                         "rank=same\n")
+                L += ["\t" + l for l in lignes]
+                L.append("\t}\n")
+
+        # nœud de départ relié aux groupes du niveau 0
+        L.append(f"\tdebut [label={_dot_id(self.titre_debut)} "
+                 "shape=ellipse]\n")
+        departs = _distincts(groupe[niv == 0]).tolist()
+        L += [f"\tdebut -> {E[g]}\n" for g in departs]
+        arcs = len(departs)
+
+        if reduction:
+            src, dst = self._arcs_reduits()
+        else:
+            indptr, dst = self._succ_csr
+            src = repeat(arange(N), diff(indptr))
+        detail = garde[src] & garde[dst]
+        # arcs entre tâches détaillées, pondérés comme en vue complète
+        etiquettes = {}
+        for i, j in zip(src[detail].tolist(), dst[detail].tolist()):
+            w = str(self.ponderation[noms[i]])
+            fin = etiquettes.get(w)
+            if fin is None:
+                fin = etiquettes[w] = (f" [label={_dot_id(w)} "
+                                       "headport=here tailport=here]\n")
+            L.append(f"\t{E[i]} -> {E[j]}{fin}")
+        # arcs touchant un regroupement: un seul par couple de groupes
+        M = N + len(nb)
+        codes = _distincts(groupe[src[~detail]]*M + groupe[dst[~detail]])
+        L += [f"\t{E[g // M]} -> {E[g % M]} [style=dashed]\n"
+              for g in codes.tolist()]
+        return L, arcs + int(detail.sum()) + len(codes)
 
     def setlevel(self):
-        """calculer les niveaux des sommets
+        """calculer les niveaux des sommets en O(V+E) (tri topologique par
+        couches): le niveau d'un sommet est la longueur du plus long chemin
+        qui y mène.
 
         créer un attribut self.niveaux de type dict.
         clé, valeur: nom du sommet, niveau
         :rtype: None
+        :raises CircuitError: si le graphe comporte un circuit
         """
-        A = self.mat_adj.copy()
-        L = [(i+1) for i in range(len(A)) if self._col_is_null(A, i)]
-        c = 0 # compteur de niveau
-        D = {} # dico des niveaux
-        for e in L: # mise à jour niveau 0
-            D[e] = c
-        while len(D) < len(A):
-            c += 1
-            A = A @ self.mat_adj
-            M = L
-            L = [(i+1) for i in range(len(A)) if self._col_is_null(A, i)]
-            # calcul des nv sommets sans pred
-            delta = set(L).difference(set(M))
-            for e in delta: # mise à jour niveau c
-                D[e] = c
-        D1 = [(self.num_sommets[k], v) for k, v in D.items()]
-        self.niveaux = dict(D1)
-
-    def _col_is_null(self, M, i):
-        """la colonne i de M est-elle nulle?
-        """
-        return sum(M[:, i]) == 0
+        self.niveaux = self._niveaux()
 
     def _nb(self, s):
         """convertir la chaîne de caractère s en nombre int ou float
-        si s contient un . on renvoie un numpy.float_ sinon un int
+        si s contient un . on renvoie un float (arrondi à _PREC_MAX
+        décimales, comme les durées) sinon un int
         """
-        return float16(s) if "." in s else int(s)
+        return round(float(s), _PREC_MAX) if "." in s else int(s)
 
     def _pretty(self, n):
-        """convertir un nombre n en string selon qu'il soit int ou float_ en 
-        tenant compte de la précision calculée dans self.prec dans __init__
+        """convertir une valeur n en virgule fixe (entier d'unité
+        10**-prec) en string: sans décimale si elle est entière, sinon avec
+        au plus self.prec chiffres après la virgule
+        """
+        n = int(n)
+        q, r = divmod(-n if n < 0 else n, self._echelle)
+        s = str(q) if r == 0 else f"{q}.{r:0{self.prec}d}".rstrip("0")
+        return "-" + s if n < 0 else s
+
+    def _ordonnancer(self):
+        """calculer les dates au plus tôt, au plus tard, les marges libres
+        et totales, en virgule fixe, dans les arrays self._ed, self._ld,
+        self._ml, self._mt.
+
+        une passe avant puis une passe arrière sur les couches du tri
+        topologique; chaque couche est traitée d'un bloc par numpy.
         """
-        # cas d'un int ou pas
-        return str(n) if n == floor(n) else str(round(n, self.prec))
+        niv, ordre = self._ordre()
+        N = len(self._noms)
+        if len(ordre) < N:
+            raise CircuitError(self._circuit())
+        d = self._durees
+        sptr, sind = self._succ_csr
+        pptr, pind = self._pred_csr
+        with _phase("ordonnancement") as ph:
+            # découpage de l'ordre en couches
+            couches = split(ordre, cumsum(bincount(niv))[:-1])
+            ed = zeros(N, dtype=d.dtype)
+            for L in couches[1:]:
+                # on ajoute le poids de la tâche précédente
+                pos = _plages(pptr, L)
+                nb = pptr[L+1] - pptr[L]
+                val = ed[pind[pos]] + d[pind[pos]]
+                ed[L] = maximum.reduceat(val, cumsum(nb) - nb)
+            ld = ed.copy() # sommets sans successeur: ld = ed
+            ml = zeros(N, dtype=d.dtype)
+            for L in reversed(couches):
+                L = L[sptr[L+1] > sptr[L]]
+                if len(L) == 0:
+                    continue
+                # on soustrait le poids de la tâche actuelle
+                pos = _plages(sptr, L)
+                nb = sptr[L+1] - sptr[L]
+                debuts = cumsum(nb) - nb
+                ld[L] = minimum.reduceat(ld[sind[pos]], debuts) - d[L]
+                # on en profite pour faire la marge libre
+                ml[L] = minimum.reduceat(ed[sind[pos]], debuts) - d[L] - ed[L]
+            self._ed, self._ld, self._ml, self._mt = ed, ld, ml, ld - ed
+            ph.noter(iterations=len(couches), octets=4*ed.nbytes)
+        self._sales = None
+
+    def _synchroniser(self):
+        """recopier dans les nœuds les dates calculées (champs demandés par
+        earliestdate/latestdate) qui ont changé depuis le dernier rendu
+        """
+        if not self._affiche or self._sales == set():
+            return
+        champs = sorted(self._affiche)
+        valeurs = [getattr(self, "_" + c).tolist() for c in champs]
+        I = (range(len(self._noms)) if self._sales is None
+             else sorted(self._sales))
+        with _phase("setdata") as ph:
+            for i in I:
+                self.sommets[self._noms[i]].setdata(
+                    **{c: self._pretty(v[i]) for c, v in zip(champs, valeurs)})
+            ph.noter(noeuds=len(I))
+        self._sales = set()
 
     def earliestdate(self):
-        """màj des données de ed des nœuds
-        """
-        Ltmp = list(self.niveaux.items())
-        L = sorted(Ltmp, key=lambda e: e[1]) # tri sur niveau
-        for s, n in L:
-            # on ajoute le poids de la tâche précédente e
-            poids_pred = [self._nb(self.sommets[e].data["ed"])
-                          +self.ponderation[e]
-                          for e in self.predecesseurs[s]]
-            m = (max(poids_pred) if len(poids_pred) > 0 else 0)
-            self.sommets[s].setdata(ed=self._pretty(m))
+        """calcul des dates au plus tôt self.ed; les nœuds seront mis à
+        jour au prochain makeGraphviz
+        """
+        self._relire_ponderation()
+        self._ordonnancer()
+        self._affiche.add("ed")
 
     def latestdate(self):
-        """màj des données de ld des nœuds, à faire après earliestdate()
-        """
-        Ltmp = list(self.niveaux.items())
-        L = sorted(Ltmp, key=lambda e: e[1]) # tri sur niveau
-        L.reverse() # en ordre décroissant
-        for s, n in L:
-            # on soustrait le poids de la tâche actuelle s
-            poids_suc = [self._nb(self.sommets[e].data["ld"])
-                         -self.ponderation[s]
-                         for e in self.successeurs[s]]
-            ld = (min(poids_suc) if len(poids_suc) > 0 else
-                  self._nb(self.sommets[s].data["ed"]))
-            self.sommets[s].setdata(ld=self._pretty(ld))
-            # on en profite pour faire la marge libre
-            tmp = [(self._nb(self.sommets[e].data["ed"])
-                    -self.ponderation[s]
-                    -self._nb(self.sommets[s].data["ed"]))
-                   for e in self.successeurs[s]]
-            ml = (min(tmp) if len(tmp) > 0 else 0)
-            #marge totale
-            mt = (self._nb(self.sommets[s].data["ld"])
-                  -self._nb(self.sommets[s].data["ed"]))
-            self.sommets[s].setdata(mt=self._pretty(mt),
-                                    ml=self._pretty(ml))
+        """calcul des dates au plus tard self.ld et des marges self.ml,
+        self.mt; les nœuds seront mis à jour au prochain makeGraphviz
+        """
+        if self._relire_ponderation() or self._ed is None:
+            self._ordonnancer()
+        self._affiche.update(["ed", "ld", "ml", "mt"])
+        self._sales = None
+
+    def update_duration(self, tache, d):
+        """modifier la durée d'une tâche en ne recalculant que le
+        nécessaire: dates au plus tôt de ses descendants, dates au plus tard
+        de ses ancêtres (de tout le graphe si la durée du projet change),
+        marges des sommets concernés.
+
+        :param tache: nom de la tâche
+        :param d: nouvelle durée (int, float ou str)
+        """
+        i = self._index[tache]
+        self._modifier_durees({i: d})
+        self.ponderation[tache] = self._pond_lue[tache] = self._nb(str(d))
+        self._reordonnancer(_atteints(self._succ_csr, [i]), {i})
+
+    def _modifier_durees(self, modifs):
+        """écrire dans self._durees les nouvelles durées {indice: valeur},
+        en élargissant la virgule fixe si besoin (_changer_prec)
+
+        :raises ValueError: si la somme des durées dépasse alors un int64
+        """
+        prec = max(self.prec, max(map(_decimales, modifs.values())))
+        V = {i: _virgule_fixe(v, prec) for i, v in modifs.items()}
+        anciens = abs(self._durees[list(V)]).sum(dtype=float64)
+        total = (float(abs(self._durees).sum(dtype=float64)) - anciens
+                 ) * 10**(prec - self.prec) + sum(map(abs, V.values()))
+        _verifier_capacite(total, prec)
+        self._changer_prec(prec)
+        for i, v in V.items():
+            self._durees[i] = v
+
+    def _changer_prec(self, prec):
+        """passer la virgule fixe à prec décimales si elle en a moins
+        (durées et dates déjà calculées multipliées d'autant)
+        """
+        if prec <= self.prec:
+            return
+        f = 10**(prec - self.prec)
+        self._durees = self._durees * f
+        if self._ed is not None:
+            self._ed, self._ld, self._ml, self._mt = (
+                T * f for T in (self._ed, self._ld, self._ml, self._mt))
+        self.prec = prec
+
+    def _relire_ponderation(self):
+        """reporter dans self._durees les durées modifiées directement dans
+        le dictionnaire self.ponderation (G.ponderation["C"] = 12): c'est
+        lui qui fait foi pour earliestdate et latestdate. Renvoie True si une
+        durée a changé (les dates calculées sont alors périmées).
+
+        seules les entrées qui diffèrent de la dernière lecture
+        (self._pond_lue) sont converties: les autres gardent leur valeur
+        exacte, que l'affichage en flottant arrondirait.
+        """
+        P = self.__dict__.get("ponderation")
+        if P is None or P == self._pond_lue: # jamais construit ou modifié
+            return False
+        self._modifier_durees({self._index[k]: v for k, v in P.items()
+                               if self._pond_lue.get(k) != v})
+        self._pond_lue = dict(P)
+        return True
+
+    def add_dependency(self, a, b):
+        """ajouter la contrainte « a précède b » puis mettre à jour niveaux
+        et dates comme pour update_duration.
+
+        la recherche de circuit se limite aux sommets de niveau inférieur à
+        celui de a.
+
+        :raises CircuitError: si l'arc crée un circuit
+        """
+        i, j = self._index_arc(a, b)
+        if j in self._succ_csr[1][self._succ_csr[0][i]:self._succ_csr[0][i+1]]:
+            return
+        circuit = self._chemin(j, i)
+        if circuit is not None:
+            raise CircuitError([a] + [self._noms[k] for k in circuit],
+                               f"l'arc {a} -> {b} crée un circuit")
+        fin = self._index["fin"]
+        if self.successeurs[a] == ["fin"]: # a n'est plus une tâche finale
+            self._modifier_arc(i, fin, False)
+        self._modifier_arc(i, j, True)
+        self._reordonnancer({j} | _atteints(self._succ_csr, [j]), {i})
+
+    def remove_dependency(self, a, b):
+        """retirer la contrainte « a précède b » puis mettre à jour niveaux
+        et dates comme pour update_duration.
+
+        :raises ValueError: si la contrainte n'existe pas
+        """
+        i, j = self._index_arc(a, b)
+        if b not in self.successeurs[a]:
+            raise ValueError(f"pas de contrainte {a} -> {b}")
+        self._modifier_arc(i, j, False)
+        if not self.successeurs[a]: # a devient une tâche finale
+            self._modifier_arc(i, self._index["fin"], True)
+        self._reordonnancer({j} | _atteints(self._succ_csr, [j]), {i})
+
+    def _invalider(self):
+        """oublier aussi le plan d'évaluation par couches
+        """
+        GrapheSimple._invalider(self)
+        self._plan = None
+
+    def _plan_evaluation(self):
+        """plan d'évaluation par couches (niveaux de setlevel), en cache
+        """
+        if self._plan is None:
+            niv = asarray([self.niveaux[k] for k in self._noms], dtype=int64)
+            self._plan = _plan_couches(niv, self._succ_csr, self._pred_csr)
+        return self._plan
+
+    def evaluate(self, durations):
+        """évaluer d'un coup S scénarios de durées sur la même structure
+        (jeux d'hypothèses, plans d'accélération, tirages PERT…).
+
+        les colonnes sont rangées comme num_sommets; la colonne de « fin »
+        peut être omise (elle est alors nulle). Les nœuds et self.ed, … ne
+        sont pas modifiés.
+
+        :param durations: array (S, N) ou (S, N-1) des durées, ou (N,)
+        :returns: dict des numpy.array ed et ld (S, N), duree (S,) durée du
+            projet et critique (S, N) masque des tâches critiques
+
+        Exemple::
+
+        >>> D = np.array([[7, 3, 4, 2, 8, 6, 5, 7, 5, 3],
+                          [7, 3, 12, 2, 8, 6, 5, 7, 5, 3]])
+        >>> G.evaluate(D)["duree"]
+        array([27., 29.])
+        """
+        D = atleast_2d(asarray(durations, dtype=float64))
+        fin = self._index["fin"]
+        if D.shape[1] == len(self._noms) - 1:
+            D = insert(D, fin, 0, axis=1)
+        elif D.shape[1] != len(self._noms):
+            raise ValueError(f"{len(self._noms)-1} colonnes de durées "
+                             f"attendues, {D.shape[1]} reçues")
+        plan = self._plan_evaluation()
+        with _phase("evaluate") as ph:
+            R = _evaluer(plan, D, fin)
+            ph.noter(scenarios=len(D), octets=2*R["ed"].nbytes)
+        return R
+
+    def _index_arc(self, a, b):
+        """indices des tâches a et b, qui ne peuvent pas être « fin »
+        """
+        if "fin" in (a, b):
+            raise ValueError("les arcs vers fin sont gérés automatiquement")
+        return self._index[a], self._index[b]
+
+    def _chemin(self, i, j):
+        """un chemin de i à j (liste d'indices) ou None; seuls les sommets
+        de niveau inférieur à celui de j peuvent y mener
+        """
+        if i == j:
+            return [i]
+        niv, noms = self.niveaux, self._noms
+        seuil = niv[noms[j]]
+        indptr, indices = self._succ_csr
+        parent = {i: None}
+        pile = [i]
+        while pile:
+            u = pile.pop()
+            for v in indices[indptr[u]:indptr[u+1]].tolist():
+                if v in parent or (v != j and niv[noms[v]] >= seuil):
+                    continue
+                parent[v] = u
+                if v == j:
+                    C = [v]
+                    while parent[C[-1]] is not None:
+                        C.append(parent[C[-1]])
+                    return C[::-1]
+                pile.append(v)
+        return None
+
+    def _reordonnancer(self, avant, arriere):
+        """mise à jour incrémentale après une modification locale.
+
+        :param avant: sommets dont le niveau et la date au plus tôt peuvent
+            changer (stable par descendance)
+        :param arriere: sommets dont la durée ou les successeurs ont changé:
+            leur date au plus tard et celles de leurs ancêtres sont à revoir
+        """
+        d, noms = self._durees, self._noms
+        pptr, pind = self._pred_csr
+        sptr, sind = self._succ_csr
+        dates = self._ed is not None
+        if dates:
+            ed, ld, ml = self._ed, self._ld, self._ml
+            fin = self._index["fin"]
+            duree = ed[fin]
+        for v in _ordre_local(avant, self._succ_csr, self._pred_csr):
+            P = pind[pptr[v]:pptr[v+1]]
+            self.niveaux[noms[v]] = (max(self.niveaux[noms[p]]
+                                         for p in P.tolist()) + 1
+                                     if len(P) else 0)
+            if dates:
+                ed[v] = (ed[P] + d[P]).max() if len(P) else 0
+        if not dates:
+            return
+        if ed[fin] != duree: # la durée du projet change: tout est à revoir
+            self._ordonnancer()
+            return
+        # sommets sans successeur parmi ceux modifiés: ld = ed
+        arriere = set(arriere) | {v for v in avant if sptr[v] == sptr[v+1]}
+        haut = arriere | _atteints(self._pred_csr, arriere)
+        for u in _ordre_local(haut, self._pred_csr, self._succ_csr):
+            S = sind[sptr[u]:sptr[u+1]]
+            ld[u] = ld[S].min() - d[u] if len(S) else ed[u]
+        # marges libres: sommets modifiés et prédécesseurs des ed modifiées
+        marges = avant | arriere | {p for v in avant
+                                    for p in pind[pptr[v]:pptr[v+1]].tolist()}
+        for u in marges:
+            S = sind[sptr[u]:sptr[u+1]]
+            ml[u] = ed[S].min() - d[u] - ed[u] if len(S) else 0
+        touches = list(marges | haut)
+        self._mt[touches] = ld[touches] - ed[touches]
+        if self._sales is not None:
+            self._sales.update(touches)
@@ -0,0 +1,152 @@
+""".. py:module:: grapheMPM.chargement
+    Chargement en flux de gros plannings (fichiers CSV ou JSONL)
+
+.. py:function:: lire_csv
+    construire un GrapheMPM depuis un fichier CSV (une ligne par tâche).
+
+.. py:function:: lire_jsonl
+    construire un GrapheMPM depuis un fichier JSON lines (un objet par
+    tâche).
+
+Les fichiers sont lus ligne à ligne: les noms des tâches sont internés en
+entiers et les arcs et durées s'accumulent dans des tableaux typés
+(array.array, 8 octets par valeur), sans dictionnaire intermédiaire par
+ligne. Les durées sont gardées en virgule fixe (entier et nombre de
+décimales écrites), sans passer par un flottant. Les noms de tâches
+peuvent être quelconques (plusieurs caractères).
+"""
+import csv
+import json
+from array import array
+
+from numpy import frombuffer, int64, float64, nonzero, cumsum, uint8
+
+from . import GrapheMPM, _virgule_fixe, _decimales, _verifier_capacite
+
+
+class _Collecteur():
+    """noms internés, arcs et durées accumulés au fil de la lecture
+    """
+    def __init__(self):
+        self.ids = {}
+        self.noms = []
+        self.src, self.dst = array("q"), array("q")
+        self.durees = array("q") # en unités de 10**-decimales[i]
+        self.decimales = bytearray()
+        self.definie = bytearray() # 1 si la tâche a sa propre ligne
+        self.prec = 0
+
+    def _id(self, nom):
+        nom = str(nom) # identifiants entiers du JSON: noms comme les autres
+        i = self.ids.get(nom)
+        if i is None:
+            i = self.ids[nom] = len(self.noms)
+            self.noms.append(nom)
+            self.durees.append(0)
+            self.decimales.append(0)
+            self.definie.append(0)
+        return i
+
+    def ajouter(self, tache, duree, predecesseurs):
+        """enregistrer la ligne d'une tâche
+
+        :param duree: durée (nombre ou texte)
+        :param predecesseurs: itérable des noms des prédécesseurs
+        """
+        i = self._id(tache)
+        if self.definie[i]:
+            raise ValueError(f"tâche {tache} définie deux fois")
+        self.definie[i] = 1
+        d = str(duree).strip()
+        n = _decimales(d)
+        v = _virgule_fixe(d, n)
+        _verifier_capacite(abs(v), n)
+        self.prec = max(self.prec, n)
+        self.durees[i] = v
+        self.decimales[i] = n
+        for p in predecesseurs:
+            self.src.append(self._id(p))
+            self.dst.append(i)
+
+    def graphe(self, **options):
+        """GrapheMPM des tâches lues; comme pour les dictionnaires, les
+        prédécesseurs qui n'ont pas leur propre ligne sont ignorés
+        """
+        src = frombuffer(self.src, dtype=int64)
+        dst = frombuffer(self.dst, dtype=int64)
+        # mise à la précision commune: unité 10**-prec
+        decimales = frombuffer(self.decimales, dtype=uint8).astype(int64)
+        durees = frombuffer(self.durees, dtype=int64)
+        facteurs = 10**(self.prec - decimales)
+        # contrôle en flottant avant le produit, qui déborderait sans erreur
+        _verifier_capacite(float(abs(durees.astype(float64)) @ facteurs),
+                           self.prec)
+        durees = durees * facteurs
+        definie = frombuffer(self.definie, dtype=uint8).astype(bool)
+        noms = self.noms
+        if not definie.all():
+            garde = definie[src]
+            nouveau = cumsum(definie) - 1 # nouvel identifiant
+            src, dst = nouveau[src[garde]], nouveau[dst[garde]]
+            durees = durees[definie]
+            noms = [noms[k] for k in nonzero(definie)[0].tolist()]
+        return GrapheMPM._depuis_arcs(noms, src, dst, durees, self.prec,
+                                      **options)
+
+
+def lire_csv(chemin, tache="tache", duree="duree",
+             predecesseurs="predecesseurs", separateur=";", delimiter=",",
+             encoding="utf-8", **options):
+    """construire un GrapheMPM depuis un fichier CSV avec en-tête, une
+    ligne par tâche.
+
+    :param chemin: chemin du fichier
+    :param tache: nom de la colonne des noms de tâches
+    :param duree: nom de la colonne des durées
+    :param predecesseurs: nom de la colonne des prédécesseurs, séparés par
+        separateur (vide si aucun)
+    :param delimiter: séparateur des colonnes du fichier
+    :param options: passées au GrapheMPM (presentation, marges…)
+    :rtype: GrapheMPM
+
+    Exemple::
+
+    >>> # tache,duree,predecesseurs
+    >>> # coffrage,7,
+    >>> # ferraillage,3,coffrage
+    >>> # coulage,4.5,coffrage;ferraillage
+    >>> G = lire_csv("chantier.csv")
+    """
+    C = _Collecteur()
+    with open(chemin, newline="", encoding=encoding) as f:
+        lignes = csv.reader(f, delimiter=delimiter)
+        entete = next(lignes)
+        it, id_, ip = (entete.index(c) for c in (tache, duree, predecesseurs))
+        for L in lignes:
+            if not L:
+                continue
+            P = L[ip].strip()
+            C.ajouter(L[it].strip(), L[id_],
+                      [p.strip() for p in P.split(separateur)] if P else [])
+    return C.graphe(**options)
+
+
+def lire_jsonl(chemin, tache="tache", duree="duree",
+               predecesseurs="predecesseurs", encoding="utf-8", **options):
+    """construire un GrapheMPM depuis un fichier JSON lines: un objet par
+    ligne, par exemple {"tache": "coulage", "duree": 4.5,
+    "predecesseurs": ["coffrage", "ferraillage"]}.
+
+    :param chemin: chemin du fichier
+    :param tache, duree, predecesseurs: clés des objets
+    :param options: passées au GrapheMPM (presentation, marges…)
+    :rtype: GrapheMPM
+    """
+    C = _Collecteur()
+    with open(chemin, encoding=encoding) as f:
+        for ligne in f:
+            if not ligne.strip():
+                continue
+            o = json.loads(ligne)
+            C.ajouter(o[tache], o[duree], o.get(predecesseurs) or [])
+    return C.graphe(**options)
@@ -0,0 +1,142 @@
+""".. py:module:: grapheMPM.mesures
+    Instrumentation des phases de calcul de grapheMPM
+
+.. py:class:: Mesures
+    gestionnaire de contexte qui cumule, par phase, le nombre d'appels, le
+    temps écoulé et les compteurs notés (octets alloués, arcs émis…).
+
+.. py:function:: ajouter_ecouteur
+    enregistrer une fonction appelée à la fin de chaque phase.
+
+.. py:function:: retirer_ecouteur
+    désenregistrer une fonction ajoutée par ajouter_ecouteur.
+
+Sans écouteur, phase() renvoie un objet inerte partagé: le coût se limite
+à un test de liste vide par phase.
+"""
+from time import perf_counter
+
+
+# fonctions f(nom, duree, infos) appelées en fin de phase
+_ECOUTEURS = []
+
+
+def ajouter_ecouteur(f):
+    """appeler f(nom, duree, infos) à la fin de chaque phase: nom de la
+    phase, durée en secondes, dict des compteurs notés pendant la phase
+    """
+    _ECOUTEURS.append(f)
+
+
+def retirer_ecouteur(f):
+    _ECOUTEURS.remove(f)
+
+
+class _Phase():
+    """phase en cours de mesure
+    """
+    __slots__ = ("nom", "debut", "infos")
+
+    def __init__(self, nom):
+        self.nom = nom
+        self.infos = {}
+
+    def __enter__(self):
+        self.debut = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duree = perf_counter() - self.debut
+        for f in list(_ECOUTEURS):
+            f(self.nom, duree, self.infos)
+
+    def noter(self, **compteurs):
+        """ajouter des compteurs (nombres) à la phase
+        """
+        for k, v in compteurs.items():
+            self.infos[k] = self.infos.get(k, 0) + v
+
+
+class _Inerte():
+    """phase non mesurée: ne fait rien
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def noter(self, **compteurs):
+        pass
+
+
+_INERTE = _Inerte()
+
+
+def phase(nom):
+    """gestionnaire de contexte d'une phase de calcul::
+
+        with phase("adjacence") as p:
+            …
+            p.noter(octets=M.nbytes)
+    """
+    return _Phase(nom) if _ECOUTEURS else _INERTE
+
+
+class Mesures():
+    """cumul des mesures par phase, actif dans un bloc with.
+
+    Phases instrumentées: adjacence (construction des listes d'adjacence),
+    adjacence.dense (matrice d'adjacence dense), setlevel et setlevel.kahn
+    (tri topologique, compteur iterations), fermeture (bitsets),
+    reduction (réduction transitive, compteur aretes retirées),
+    puissances et puissances.latex (une par matrice calculée),
+    ordonnancement (dates, compteur iterations), setdata (compteur noeuds),
+    makeGraphviz (compteurs noeuds et aretes), latex (write_latex,
+    compteur lignes), evaluate (compteur scenarios). Le compteur octets
+    donne la taille des arrays alloués.
+
+    Les phases peuvent être imbriquées: le temps d'une phase inclut celui
+    des phases qu'elle appelle.
+
+    Exemple::
+
+    >>> with Mesures() as m:
+    ...     G = GrapheMPM(pred=p, pond=w, sparse=True)
+    ...     G.latestdate()
+    ...     G.makeGraphviz()
+    >>> m.resultats()["makeGraphviz"]
+    {'appels': 1, 'temps': 0.0004, 'noeuds': 11, 'aretes': 16}
+    >>> m.json()
+    """
+    def __init__(self):
+        self.phases = {}
+
+    def __call__(self, nom, duree, infos):
+        P = self.phases.get(nom)
+        if P is None:
+            P = self.phases[nom] = {"appels": 0, "temps": 0.0}
+        P["appels"] += 1
+        P["temps"] += duree
+        for k, v in infos.items():
+            P[k] = P.get(k, 0) + v
+
+    def __enter__(self):
+        ajouter_ecouteur(self)
+        return self
+
+    def __exit__(self, *exc):
+        retirer_ecouteur(self)
+
+    def resultats(self):
+        """dict phase -> dict des cumuls (appels, temps en s, compteurs)
+        """
+        return {k: dict(v) for k, v in self.phases.items()}
+
+    def json(self, **kwargs):
+        """resultats() au format json (kwargs passés à json.dumps)
+        """
+        import json
+        return json.dumps(self.resultats(), **kwargs)
@@ -0,0 +1,362 @@
+""".. py:module:: grapheMPM.rendu
+    Rendu graphviz avec cache sur disque adressé par le contenu
+
+.. py:class:: CacheRendu
+    cache des images produites par graphviz: la clé est l'empreinte sha256
+    de la source DOT, du format et du moteur; dot n'est lancé qu'en cas
+    d'absence, les fichiers les moins récemment utilisés sont supprimés au
+    delà d'une taille maximale.
+
+.. py:function:: rendre
+    équivalent de Digraph.render qui passe par un CacheRendu.
+
+.. py:function:: rendre_lot
+    rendre de nombreux graphes en parallèle, les échecs étant signalés
+    élément par élément.
+
+.. py:function:: cache_defaut
+    CacheRendu partagé, dans ~/.cache/grapheMPM (ou $GRAPHEMPM_CACHE).
+
+.. py:function:: arendre
+    rendu asynchrone (asyncio) d'une source DOT, renvoyé en bytes par un
+    sous-processus graphviz, avec limite de rendus simultanés et délai.
+"""
+import asyncio
+import os
+import subprocess
+import threading
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from pathlib import Path
+
+from .mesures import phase as _phase
+
+
+def _executer(source, format, engine, renderer=None, formatter=None):
+    """lancer graphviz sur la source DOT (bytes) et renvoyer la sortie
+    """
+    import graphviz
+    return graphviz.pipe(engine, format, source, renderer=renderer,
+                         formatter=formatter, quiet=True)
+
+
+class CacheRendu():
+    """cache sur disque des rendus graphviz, borné en taille (LRU).
+
+    les fichiers sont rangés dans dossier/ab/abcdef….format, où abcdef… est
+    l'empreinte de (source, format, moteur, renderer, formatter). Un accès
+    réussi met à jour la date de modification du fichier: l'éviction
+    supprime les fichiers les plus anciens jusqu'à revenir sous taille_max.
+
+    la version de graphviz ne fait pas partie de la clé: appeler vider()
+    après une mise à jour de graphviz.
+
+    :param dossier: dossier du cache (créé au besoin)
+    :param taille_max: taille maximale du cache en octets
+
+    Exemple::
+
+    >>> cache = CacheRendu("/tmp/rendus", taille_max=64*2**20)
+    >>> png = cache.obtenir(G.gv.source, "png")
+    >>> cache.succes, cache.echecs
+    (0, 1)
+    """
+    def __init__(self, dossier, taille_max=256*2**20):
+        self.dossier = Path(dossier)
+        self.taille_max = taille_max
+        self.succes = self.echecs = 0
+        self._taille = None # octets occupés, calculés au premier ajout
+        self._verrou = threading.Lock() # utilisable depuis plusieurs threads
+
+    def cle(self, source, format, engine="dot", renderer=None,
+            formatter=None):
+        """empreinte hexadécimale d'une demande de rendu
+        """
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        h = sha256(source)
+        h.update("\0".join(["", format, engine, renderer or "",
+                            formatter or ""]).encode())
+        return h.hexdigest()
+
+    def chemin(self, cle, format):
+        return self.dossier / cle[:2] / f"{cle}.{format}"
+
+    def obtenir(self, source, format="png", engine="dot", renderer=None,
+                formatter=None):
+        """octets du rendu de la source DOT, depuis le cache ou en lançant
+        graphviz
+
+        :param source: source DOT (str ou bytes utf-8)
+        :rtype: bytes
+        """
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        cle = self.cle(source, format, engine, renderer, formatter)
+        f = self.chemin(cle, format)
+        try:
+            donnees = f.read_bytes()
+        except FileNotFoundError:
+            pass
+        else:
+            with self._verrou:
+                self.succes += 1
+            try:
+                os.utime(f) # récemment utilisé
+            except OSError:
+                pass
+            return donnees
+        with self._verrou:
+            self.echecs += 1
+        with _phase("rendu") as ph:
+            donnees = _executer(source, format, engine, renderer, formatter)
+            ph.noter(octets=len(donnees))
+        self._ajouter(f, donnees)
+        return donnees
+
+    def _ajouter(self, f, donnees):
+        """écrire un rendu (de façon atomique) puis évincer au besoin
+        """
+        f.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f.with_name(f"{f.name}.{os.getpid()}."
+                          f"{threading.get_ident()}.tmp")
+        tmp.write_bytes(donnees)
+        os.replace(tmp, f)
+        with self._verrou:
+            if self._taille is None:
+                self._taille = sum(s.st_size for _, s in self._fichiers())
+            else:
+                self._taille += len(donnees)
+            if self._taille > self.taille_max:
+                self._evincer()
+
+    def _fichiers(self):
+        """liste des (chemin, stat) des rendus présents dans le cache
+        """
+        L = []
+        if not self.dossier.is_dir():
+            return L
+        for d in os.scandir(self.dossier):
+            if not d.is_dir():
+                continue
+            for e in os.scandir(d.path):
+                if e.is_file() and not e.name.endswith(".tmp"):
+                    try:
+                        L.append((e.path, e.stat()))
+                    except FileNotFoundError: # supprimé entre-temps
+                        pass
+        return L
+
+    def _evincer(self):
+        """supprimer les rendus les moins récemment utilisés jusqu'à
+        revenir sous taille_max
+        """
+        L = sorted(self._fichiers(), key=lambda x: x[1].st_mtime)
+        taille = sum(s.st_size for _, s in L)
+        for chemin, s in L:
+            if taille <= self.taille_max:
+                break
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+            taille -= s.st_size
+        self._taille = taille
+
+    def taille(self):
+        """octets occupés par le cache
+        """
+        return sum(s.st_size for _, s in self._fichiers())
+
+    def vider(self):
+        """supprimer tous les rendus du cache
+        """
+        for chemin, _ in self._fichiers():
+            os.remove(chemin)
+        self._taille = 0
+
+
+_CACHE = None
+
+
+def cache_defaut():
+    """CacheRendu partagé: dossier $GRAPHEMPM_CACHE, sinon
+    $XDG_CACHE_HOME/grapheMPM ou ~/.cache/grapheMPM
+    """
+    global _CACHE
+    if _CACHE is None:
+        dossier = os.environ.get("GRAPHEMPM_CACHE")
+        if not dossier:
+            base = os.environ.get("XDG_CACHE_HOME",
+                                  os.path.join(os.path.expanduser("~"),
+                                               ".cache"))
+            dossier = os.path.join(base, "grapheMPM")
+        _CACHE = CacheRendu(dossier)
+    return _CACHE
+
+
+def rendre(gv, filename=None, directory=None, format=None, engine=None,
+           cleanup=False, cache=None):
+    """comme gv.render: écrire la source DOT dans filename (sauf si
+    cleanup) et l'image dans filename.format, mais en passant par le cache.
+
+    :param gv: graphviz.Digraph (attribut gv d'un graphe)
+    :param cache: CacheRendu (cache_defaut() par défaut, False pour lancer
+        graphviz sans cache)
+    :returns: chemin du fichier image
+    :rtype: str
+    """
+    format = format or gv.format or "pdf"
+    engine = engine or gv.engine
+    filename = filename or gv.filename
+    source = gv.source.encode(gv.encoding)
+    if cache is False:
+        donnees = _executer(source, format, engine, gv.renderer,
+                            gv.formatter)
+    else:
+        donnees = (cache or cache_defaut()).obtenir(
+            source, format, engine, gv.renderer, gv.formatter)
+    chemin = Path(directory or gv.directory or "", filename)
+    if chemin.parent != Path(""):
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+    if not cleanup:
+        chemin.write_bytes(source)
+    sortie = Path(f"{chemin}.{format}")
+    sortie.write_bytes(donnees)
+    return str(sortie)
+
+
+# résultat d'un élément de rendre_lot: chemin du fichier produit, ou
+# l'exception levée (chemin vaut alors None)
+Rendu = namedtuple("Rendu", ["filename", "format", "chemin", "erreur"])
+
+
+def _digraph(objet):
+    """objet graphviz d'un graphe (attribut gv), d'un Digraph ou d'une
+    source DOT
+    """
+    if isinstance(objet, str):
+        from graphviz import Source
+        return Source(objet)
+    return getattr(objet, "gv", objet)
+
+
+def rendre_lot(travaux, ouvriers=None, cache=None, cleanup=False):
+    """rendre de nombreux graphes dans plusieurs formats, en parallèle.
+
+    les rendus sont répartis sur un nombre borné de threads: le travail se
+    fait dans les processus graphviz, qui tournent donc simultanément. Une
+    erreur (graphe sans makeGraphviz, échec de dot…) n'interrompt pas le
+    lot: elle est renvoyée dans le résultat de l'élément concerné.
+
+    :param travaux: itérable de triplets (objet, filename, formats): objet
+        est un graphe (GrapheSimple, GrapheMPM… après makeGraphviz), un
+        graphviz.Digraph ou une source DOT (str); formats est un format ou
+        une liste de formats
+    :param ouvriers: nombre de rendus simultanés (cpu_count() par défaut)
+    :param cache: comme pour rendre
+    :returns: liste de Rendu(filename, format, chemin, erreur), dans l'ordre
+        des travaux puis des formats
+    :rtype: list
+
+    Exemple::
+
+    >>> R = rendre_lot([(G1, "ex1", ["png", "svg"]), (G2, "ex2", "pdf")])
+    >>> [r for r in R if r.erreur]
+    []
+    """
+    taches = []
+    for objet, filename, formats in travaux:
+        if isinstance(formats, str):
+            formats = [formats]
+        taches += [(objet, filename, f) for f in formats]
+
+    def faire(tache):
+        objet, filename, format = tache
+        try:
+            chemin = rendre(_digraph(objet), filename, format=format,
+                            cleanup=cleanup, cache=cache)
+        except Exception as e:
+            return Rendu(filename, format, None, e)
+        return Rendu(filename, format, chemin, None)
+
+    with ThreadPoolExecutor(ouvriers or os.cpu_count()) as ex:
+        return list(ex.map(faire, taches))
+
+
+def _commande(format, engine, renderer=None, formatter=None):
+    """ligne de commande graphviz qui lit la source DOT sur l'entrée
+    standard et écrit le rendu sur la sortie standard
+    """
+    T = format
+    if renderer or formatter:
+        T += f":{renderer or ''}" + (f":{formatter}" if formatter else "")
+    return [engine, f"-T{T}"]
+
+
+# nombre de rendus asynchrones simultanés par défaut
+RENDUS_SIMULTANES = os.cpu_count() or 4
+_SEMAPHORES = weakref.WeakKeyDictionary() # boucle asyncio -> Semaphore
+
+
+def _semaphore():
+    """sémaphore par défaut de la boucle asyncio en cours
+    """
+    boucle = asyncio.get_running_loop()
+    S = _SEMAPHORES.get(boucle)
+    if S is None:
+        S = _SEMAPHORES[boucle] = asyncio.Semaphore(RENDUS_SIMULTANES)
+    return S
+
+
+async def arendre(source, format="png", engine="dot", renderer=None,
+                  formatter=None, timeout=60, semaphore=None):
+    """rendre une source DOT sans bloquer la boucle asyncio: graphviz est
+    lancé en sous-processus, la source lui est passée sur l'entrée
+    standard et le rendu lu sur sa sortie (aucun fichier temporaire).
+
+    au plus RENDUS_SIMULTANES rendus tournent en même temps par boucle (ou
+    selon le sémaphore fourni), les suivants attendent leur tour. Un rendu
+    qui dépasse timeout secondes, ou dont la tâche est annulée, est arrêté
+    (kill) avant que l'exception ne remonte.
+
+    :param source: source DOT (str ou bytes utf-8)
+    :param timeout: délai maximal en secondes du rendu (None: sans limite),
+        attente du sémaphore non comprise
+    :param semaphore: asyncio.Semaphore limitant les rendus simultanés
+    :rtype: bytes
+    :raises TimeoutError: si le délai est dépassé
+    :raises subprocess.CalledProcessError: si graphviz échoue (stderr dans
+        l'attribut stderr)
+
+    Exemple::
+
+    >>> png = await arendre(G.write_dot(), "png", timeout=10)
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    cmd = _commande(format, engine, renderer, formatter)
+    async with semaphore or _semaphore():
+        with _phase("rendu") as ph:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE)
+            except FileNotFoundError as e:
+                from graphviz import ExecutableNotFound
+                raise ExecutableNotFound(cmd) from e
+            try:
+                sortie, erreurs = await asyncio.wait_for(
+                    proc.communicate(source), timeout)
+            except BaseException: # délai dépassé ou tâche annulée
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                raise
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, cmd,
+                                                    sortie, erreurs)
+            ph.noter(octets=len(sortie))
+    return sortie
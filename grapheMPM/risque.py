@@ -0,0 +1,259 @@
+""".. py:module:: grapheMPM.risque
+    Analyse de risque d'un planning MPM par la méthode de Monte-Carlo
+
+.. py:class:: Triangulaire
+    loi triangulaire (min, mode, max) d'une durée.
+
+.. py:class:: BetaPERT
+    loi bêta-PERT (optimiste, plus probable, pessimiste) d'une durée.
+
+.. py:class:: Empirique
+    tirage parmi des durées observées.
+
+.. py:class:: Accumulateur
+    statistiques fusionnables d'une série de tirages: histogramme et
+    quantiles de la durée du projet, indice de criticité des tâches.
+
+.. py:function:: analyse_risque
+    tirer des scénarios de durées par lots, répartis sur plusieurs
+    processus, et les accumuler en mémoire constante.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+
+from numpy import (zeros, int64, float64, linspace, searchsorted, cumsum,
+                   asarray, clip, bincount, sqrt, interp, concatenate, tile)
+from numpy.random import SeedSequence, default_rng
+
+from . import _evaluer
+
+
+class Triangulaire():
+    """loi triangulaire d'une durée
+
+    :param a: durée minimale
+    :param m: durée la plus probable
+    :param b: durée maximale
+    """
+    def __init__(self, a, m, b):
+        if not a <= m <= b:
+            raise ValueError("il faut a <= m <= b")
+        self.a, self.m, self.b = float(a), float(m), float(b)
+
+    def bornes(self):
+        return self.a, self.b
+
+    def tirer(self, rng, n):
+        if self.a == self.b:
+            return zeros(n) + self.a
+        return rng.triangular(self.a, self.m, self.b, n)
+
+
+class BetaPERT():
+    """loi bêta-PERT d'une durée
+
+    :param a: durée optimiste
+    :param m: durée la plus probable
+    :param b: durée pessimiste
+    :param lamb: poids du mode (4 pour la loi PERT classique)
+    """
+    def __init__(self, a, m, b, lamb=4):
+        if not a <= m <= b:
+            raise ValueError("il faut a <= m <= b")
+        self.a, self.m, self.b = float(a), float(m), float(b)
+        self.lamb = lamb
+
+    def bornes(self):
+        return self.a, self.b
+
+    def tirer(self, rng, n):
+        a, m, b = self.a, self.m, self.b
+        if a == b:
+            return zeros(n) + a
+        alpha = 1 + self.lamb*(m-a)/(b-a)
+        beta = 1 + self.lamb*(b-m)/(b-a)
+        return a + (b-a)*rng.beta(alpha, beta, n)
+
+
+class Empirique():
+    """tirage uniforme parmi des durées observées
+
+    :param valeurs: liste des durées observées
+    """
+    def __init__(self, valeurs):
+        self.valeurs = asarray(valeurs, dtype=float64)
+        if len(self.valeurs) == 0:
+            raise ValueError("aucune valeur observée")
+
+    def bornes(self):
+        return self.valeurs.min(), self.valeurs.max()
+
+    def tirer(self, rng, n):
+        return rng.choice(self.valeurs, n)
+
+
+class Accumulateur():
+    """statistiques de Monte-Carlo en mémoire constante, fusionnables.
+
+    la durée du projet est rangée dans un histogramme à classes fixes
+    entre lo et hi; les quantiles en sont déduits par interpolation
+    (précision: (hi-lo)/classes).
+
+    :param noms: noms des sommets, rangés comme les colonnes des scénarios
+    :param lo: durée minimale possible du projet
+    :param hi: durée maximale possible du projet
+    :param classes: nombre de classes de l'histogramme
+    """
+    def __init__(self, noms, lo, hi, classes=1000):
+        self.noms = noms
+        self.lo, self.hi = float(lo), float(hi)
+        self.bords = linspace(self.lo, max(self.hi, self.lo+1e-9), classes+1)
+        self.histogramme = zeros(classes, dtype=int64)
+        self.critiques = zeros(len(noms), dtype=int64)
+        self.n = 0
+        self.s1 = self.s2 = 0.0
+        self.min, self.max = float("inf"), float("-inf")
+
+    def ajouter(self, duree, critique):
+        """accumuler un lot de résultats de GrapheMPM.evaluate
+
+        :param duree: array (S,) des durées du projet
+        :param critique: array (S, N) des masques des tâches critiques
+        """
+        k = clip(searchsorted(self.bords, duree, side="right") - 1,
+                 0, len(self.histogramme)-1)
+        self.histogramme += bincount(k, minlength=len(self.histogramme))
+        self.critiques += critique.sum(axis=0)
+        self.n += len(duree)
+        self.s1 += float(duree.sum())
+        self.s2 += float((duree*duree).sum())
+        if len(duree):
+            self.min = min(self.min, float(duree.min()))
+            self.max = max(self.max, float(duree.max()))
+
+    def fusion(self, autre):
+        """ajouter les statistiques d'un autre accumulateur (même graphe,
+        mêmes classes)
+        """
+        self.histogramme += autre.histogramme
+        self.critiques += autre.critiques
+        self.n += autre.n
+        self.s1 += autre.s1
+        self.s2 += autre.s2
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+        return self
+
+    def moyenne(self):
+        return self.s1 / self.n
+
+    def ecart_type(self):
+        m = self.moyenne()
+        return sqrt(max(self.s2/self.n - m*m, 0.0))
+
+    def quantile(self, q):
+        """quantile(s) approché(s) de la durée du projet
+
+        :param q: float ou liste de floats dans [0, 1]
+        """
+        F = concatenate(([0], cumsum(self.histogramme))) / self.n
+        return clip(interp(q, F, self.bords), self.min, self.max)
+
+    def criticite(self):
+        """indice de criticité: dict tâche -> fréquence où elle est critique
+        """
+        return {k: c/self.n for k, c in zip(self.noms, self.critiques.tolist())
+                if k != "fin"}
+
+    def resume(self):
+        """dict des principales statistiques (pour export json…)
+        """
+        return {"n": self.n, "moyenne": self.moyenne(),
+                "ecart_type": float(self.ecart_type()),
+                "min": self.min, "max": self.max,
+                "quantiles": dict(zip(["5%", "50%", "95%"],
+                                      self.quantile([.05, .5, .95]).tolist())),
+                "criticite": self.criticite()}
+
+
+# contexte des processus de calcul, fixé une fois par l'initialiseur
+_CONTEXTE = None
+
+
+def _initialiser(contexte):
+    global _CONTEXTE
+    _CONTEXTE = contexte
+
+
+def _lot(graine, n):
+    """tirer et évaluer un lot de n scénarios dans le contexte courant
+    """
+    plan, fin, base, lois, acc = _CONTEXTE
+    rng = default_rng(graine)
+    D = tile(base, (n, 1))
+    for j, loi in lois:
+        D[:, j] = loi.tirer(rng, n)
+    R = _evaluer(plan, D, fin)
+    acc = Accumulateur(acc.noms, acc.lo, acc.hi, len(acc.histogramme))
+    acc.ajouter(R["duree"], R["critique"])
+    return acc
+
+
+def analyse_risque(G, lois, n, graine=None, processus=None, taille_lot=None,
+                   classes=1000):
+    """analyse de Monte-Carlo de la durée d'un projet GrapheMPM.
+
+    les n scénarios sont découpés en lots d'au plus taille_lot tirages;
+    chaque lot a sa propre graine issue de graine (SeedSequence.spawn): le
+    résultat ne dépend donc pas du nombre de processus.
+
+    :param G: GrapheMPM
+    :param lois: dict tâche -> loi (Triangulaire, BetaPERT, Empirique);
+        les autres tâches gardent leur durée
+    :param n: nombre de scénarios
+    :param graine: graine du générateur aléatoire, pour la reproductibilité
+    :param processus: nombre de processus (cpu_count() par défaut, 1 pour
+        tout calculer dans le processus courant)
+    :param taille_lot: nombre de scénarios par lot (par défaut de sorte que
+        les tableaux d'un lot restent de l'ordre de 32 Mo)
+    :param classes: nombre de classes de l'histogramme
+    :rtype: Accumulateur
+
+    Exemple::
+
+    >>> lois = {"C": BetaPERT(3, 4, 9), "E": Triangulaire(6, 8, 14)}
+    >>> acc = analyse_risque(G, lois, 10**6, graine=1)
+    >>> acc.quantile(0.9), acc.criticite()["C"]
+    """
+    G._relire_ponderation() # durées modifiées dans G.ponderation
+    noms = G._noms
+    N = len(noms)
+    base = G._durees / G._echelle
+    L = [(G._index[k], loi) for k, loi in lois.items()]
+    # bornes de la durée du projet: elle croît avec chaque durée
+    extremes = zeros((2, N))
+    extremes[:] = base
+    for j, loi in L:
+        extremes[:, j] = loi.bornes()
+    lo, hi = G.evaluate(extremes)["duree"].tolist()
+    acc = Accumulateur(noms, lo, hi, classes)
+    taille_lot = taille_lot or max(1, 2**22 // N)
+    tailles = [taille_lot]*(n // taille_lot)
+    if n % taille_lot:
+        tailles.append(n % taille_lot)
+    graines = SeedSequence(graine).spawn(len(tailles))
+    contexte = (G._plan_evaluation(), G._index["fin"], base, L, acc)
+    processus = processus or cpu_count()
+    if processus == 1 or len(tailles) == 1:
+        _initialiser(contexte)
+        try:
+            for r in map(_lot, graines, tailles):
+                acc.fusion(r)
+        finally: # ne pas garder le graphe en vie dans ce processus
+            _initialiser(None)
+    else:
+        with ProcessPoolExecutor(processus, initializer=_initialiser,
+                                 initargs=(contexte,)) as ex:
+            for r in ex.map(_lot, graines, tailles):
+                acc.fusion(r)
+    return acc
@@ -0,0 +1,77 @@
+import json
+import pytest
+from grapheMPM import GrapheMPM, CircuitError
+from grapheMPM.chargement import lire_csv, lire_jsonl
+
+P = {"coffrage": [], "terrassement": [], "ferraillage": ["coffrage"],
+     "coulage": ["coffrage", "terrassement"], "séchage": ["coulage"],
+     "décoffrage": ["séchage", "ferraillage"]}
+W = {"coffrage": 7, "terrassement": 3, "ferraillage": 4.5, "coulage": 2,
+     "séchage": 8, "décoffrage": 1.25}
+
+def compare(G):
+    R = GrapheMPM(pred={k: list(v) for k, v in P.items()}, pond=W, sparse=True)
+    R.latestdate()
+    G.latestdate()
+    assert G._noms == R._noms and G.prec == R.prec == 2
+    assert G.successeurs == R.successeurs and G.niveaux == R.niveaux
+    for c in ("ed", "ld", "ml", "mt"):
+        assert (getattr(G, c) == getattr(R, c)).all()
+    assert G.ponderation == R.ponderation
+
+def test_lire_csv(tmp_path):
+    f = tmp_path / "plan.csv"
+    lignes = ["tache,duree,predecesseurs"]
+    lignes += [f"{k},{W[k]},{';'.join(v)}" for k, v in P.items()]
+    lignes.append("inconnu_absent,1,fantome") # prédécesseur sans ligne: ignoré
+    f.write_text("\n".join(lignes) + "\n", encoding="utf-8")
+    G = lire_csv(f)
+    assert G.predecesseurs["inconnu_absent"] == []
+    # espaces autour des noms, dans les deux colonnes
+    f.write_text("tache,duree,predecesseurs\n a ,1,\nb , 2 , a \n",
+                 encoding="utf-8")
+    G = lire_csv(f)
+    assert G._noms == ["a", "b", "fin"] and G.predecesseurs["b"] == ["a"]
+    # on retire la tâche en plus pour comparer
+    f.write_text("\n".join(lignes[:-1]) + "\n", encoding="utf-8")
+    compare(lire_csv(f))
+
+def test_lire_jsonl(tmp_path):
+    f = tmp_path / "plan.jsonl"
+    f.write_text("\n".join(json.dumps({"tache": k, "duree": W[k],
+                                       "predecesseurs": v})
+                           for k, v in P.items()), encoding="utf-8")
+    compare(lire_jsonl(f))
+    f.write_text('{"tache": "a", "duree": 1, "predecesseurs": ["b"]}\n'
+                 '{"tache": "b", "duree": 1, "predecesseurs": ["a"]}\n')
+    with pytest.raises(CircuitError):
+        lire_jsonl(f)
+
+def test_lire_jsonl_identifiants_entiers(tmp_path):
+    f = tmp_path / "plan.jsonl"
+    f.write_text('{"tache": 1, "duree": 2, "predecesseurs": []}\n'
+                 '{"tache": 2, "duree": 3, "predecesseurs": [1]}\n'
+                 '{"tache": 10, "duree": 1, "predecesseurs": [1, 2]}\n')
+    G = lire_jsonl(f)
+    assert G._noms == ["1", "10", "2", "fin"]
+    assert G.predecesseurs["10"] == ["1", "2"]
+    G.earliestdate()
+    assert G.ed[G._index["fin"]] == 6
+
+def test_lire_csv_virgule_fixe(tmp_path):
+    f = tmp_path / "plan.csv"
+    f.write_text("tache,duree,predecesseurs\n"
+                 "a,90071992547409.93,\nb,0.1,a\nc,2,b\n", encoding="utf-8")
+    G = lire_csv(f)
+    assert G.prec == 2 and G._durees.tolist() == [9007199254740993, 10,
+                                                   200, 0]
+    G.latestdate()
+    assert G._ed[G._index["fin"]] == 9007199254740993 + 10 + 200
+    f.write_text("tache,duree,predecesseurs\n"
+                 "a,0.333333333333,\nb,100000000000000,a\nc,0.5,b\n",
+                 encoding="utf-8")
+    with pytest.raises(ValueError): # 10**14 * 10**6 déborde d'un int64
+        lire_csv(f)
+    f.write_text("tache,duree,predecesseurs\na,0.333333333333,\n",
+                 encoding="utf-8")
+    assert lire_csv(f)._durees.tolist() == [333333, 0]
@@ -0,0 +1,389 @@
+import pytest
+from grapheMPM import (GrapheSimple, GrapheSimpleNoCircuit, GrapheMPM, noeud,
+                       CircuitError)
+
+@pytest.fixture
+def pred_data():
+    return {"A": "", "B": "", "C": "A", "D": "AB", "E":"B",
+            "F":"DE", "G": "E", "H":"CF", "I":"FG", "J": "HI"}
+
+@pytest.fixture
+def pond_data():
+    return {"A": 7, "B": 3, "C": 4, "D": 2, "E": 8,
+            "F": 6, "G": 5, "H": 7, "I": 5, "J": 3}
+
+def test_sparse_dict(pred_data):
+    G = GrapheSimple(pred=pred_data)
+    S = GrapheSimple(pred=pred_data, sparse=True)
+    assert S._mat_adj is None # pas de matrice dense tant qu'on ne la demande pas
+    assert S.successeurs == G.successeurs
+    assert S.predecesseurs == G.predecesseurs
+
+def test_sparse_mat_adj(pred_data):
+    G = GrapheSimple(pred=pred_data)
+    S = GrapheSimple(succ=G.successeurs, sparse=True)
+    assert (S.mat_adj == G.mat_adj).all()
+    assert (S.mat_ferm_transitive == G.mat_ferm_transitive).all()
+
+def test_fermeture_bitsets(pred_data):
+    G = GrapheSimple(pred=pred_data)
+    A = G.mat_adj
+    M, S = A.copy(), A.copy()
+    for _ in range(len(A)):
+        M = M @ A
+        S = S + M
+    assert ((S > 0) == G.mat_ferm_transitive).all()
+    assert G.has_no_circuit()
+
+def test_fermeture_circuit():
+    G = GrapheSimple(pred={"A": "C", "B": "A", "C": "B", "D": "C"}, sparse=True)
+    assert not G.has_no_circuit()
+    assert G.mat_ferm_transitive[:3, :].all() # A, B, C s'atteignent tous
+    assert not G.mat_ferm_transitive[3].any() # D n'a pas de successeur
+
+def test_matrices_paresseuses(pred_data):
+    G = GrapheSimple(pred=pred_data)
+    assert len(G.Matrices.cache) == 0
+    assert len(G.Matrices) == len(pred_data) + 1
+    assert (G.Matrices[3] == G.mat_adj @ G.mat_adj @ G.mat_adj).all()
+    assert (G.Matrices[0] == G.mat_ferm_transitive).all()
+    G.taille_cache = 2
+    L = list(G.Matrices_latex)
+    assert len(G.Matrices.cache) <= 2 and len(G.Matrices_latex.cache) <= 2
+    assert L[-1] == G.Matrices_latex[-1]
+    assert "Prédécesseur(s)" in G.tab_latex_pred
+
+def test_dates_arrays(pred_data, pond_data):
+    G = GrapheMPM(pred=pred_data, pond=pond_data)
+    G.earliestdate()
+    G.latestdate()
+    noms = list(G.num_sommets.values())
+    ed = dict(zip(noms, G.ed.tolist()))
+    assert ed == {"A": 0, "B": 0, "C": 7, "D": 7, "E": 3, "F": 11, "G": 11,
+                  "H": 17, "I": 17, "J": 24, "fin": 27}
+    assert G.ld[noms.index("A")] == 2
+    assert G.mt[noms.index("C")] == 6 and G.ml[noms.index("C")] == 6
+    assert (G.mt >= G.ml).all()
+    # les nœuds ne sont synchronisés qu'au rendu
+    assert G.sommets["fin"].data["ed"] == "    "
+    G.makeGraphviz()
+    assert G.sommets["fin"].data["ed"] == "27"
+    assert G.sommets["A"].data["ld"] == "2"
+
+def test_noeud_gabarits():
+    n = noeud("A", presentation=1, marges=True)
+    n.setdata(ed="0", ld="2", ml="0", mt="2")
+    assert n.noeud == ('<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" '
+                       'CELLPADDING="4"><TR><TD COLSPAN="2" PORT="here">A</TD>'
+                       '</TR><TR><TD>0</TD><TD>2</TD></TR><TR><TD COLSPAN="2">'
+                       '0</TD></TR><TR><TD COLSPAN="2">2</TD></TR></TABLE>')
+    n = noeud("é<1>", presentation=3, marges=False, ed="5")
+    assert n.noeud.endswith('<TR><TD>5</TD><TD>    </TD></TR><TR><TD COLSPAN="2" '
+                            'PORT="here">&#233;&lt;1&gt;</TD></TR></TABLE>')
+    with pytest.raises(AttributeError):
+        n.autre = 1 # __slots__
+
+def test_replanification(pred_data, pond_data):
+    G = GrapheMPM(pred=pred_data, pond=pond_data)
+    G.earliestdate()
+    G.latestdate()
+    G.makeGraphviz()
+    fin = G._index["fin"]
+    G.update_duration("C", 10) # C devient critique: 7+10+7+3 = 27
+    assert G.ed[fin] == 27 and G.mt[G._index["C"]] == 0
+    G.update_duration("H", 8)
+    assert G.ed[fin] == 28
+    G.add_dependency("G", "J")
+    assert G.niveaux["J"] == 4
+    with pytest.raises(CircuitError) as e:
+        G.add_dependency("J", "A")
+    assert e.value.circuit[0] == e.value.circuit[-1] == "J"
+    G.remove_dependency("H", "J")
+    assert "fin" in G.successeurs["H"]
+    G.makeGraphviz()
+    H = GrapheMPM(succ={k: [s for s in v if s != "fin"]
+                        for k, v in G.successeurs.items() if k != "fin"},
+                  pond=dict(pond_data, C=10, H=8))
+    H.earliestdate()
+    H.latestdate()
+    for att in ("ed", "ld", "ml", "mt"):
+        assert (getattr(G, att) == getattr(H, att)).all()
+    assert G.sommets["fin"].data["ed"] == str(H.ed[fin])
+
+def test_ponderation_modifiee(pred_data, pond_data):
+    G = GrapheMPM(pred=pred_data, pond=pond_data)
+    G.earliestdate()
+    G.ponderation["C"] = 12 # 7+12+7+3 = 29
+    G.earliestdate()
+    G.latestdate()
+    fin = G._index["fin"]
+    assert G.ed[fin] == 29 and G.mt[G._index["C"]] == 0
+    G.ponderation["H"] = 7.5 # passage en virgule fixe au dixième
+    G.latestdate()
+    assert G.prec == 1 and G.ed[fin] == 29.5
+    G.makeGraphviz()
+    assert G.sommets["fin"].data["ed"] == "29.5"
+    # les durées non modifiées gardent leur valeur exacte
+    G = GrapheMPM(pred={"A": "", "B": "A"}, pond={"A": "90071992547409.93",
+                                                  "B": 1})
+    G.ponderation["B"] = 2
+    G.latestdate()
+    assert G._ed[G._index["fin"]] == 9007199254740993 + 200
+
+def test_evaluate(pred_data, pond_data):
+    G = GrapheMPM(pred=pred_data, pond=pond_data)
+    D = [[pond_data[k] for k in sorted(pond_data)]]*2
+    D[1] = list(D[1])
+    D[1][2] = 12 # C
+    R = G.evaluate(D)
+    assert R["duree"].tolist() == [27, 29]
+    G.earliestdate()
+    G.latestdate()
+    assert (R["ed"][0] == G.ed).all() and (R["ld"][0] == G.ld).all()
+    assert (R["critique"][0] == (G.mt == 0)).all()
+    assert R["critique"][1, G._index["C"]]
+    with pytest.raises(ValueError):
+        G.evaluate([[1, 2]])
+
+def test_setlevel_kahn(pred_data, pond_data):
+    G = GrapheMPM(pred=pred_data, pond=pond_data)
+    assert G.niveaux == {"A": 0, "B": 0, "C": 1, "D": 1, "E": 1, "F": 2,
+                         "G": 2, "H": 3, "I": 3, "J": 4, "fin": 5}
+
+def test_circuit_error():
+    p = {"A": "", "B": "AD", "C": "B", "D": "C", "E": "D"}
+    with pytest.raises(CircuitError) as e:
+        GrapheMPM(pred=p, pond={k: 1 for k in p})
+    C = e.value.circuit
+    assert C[0] == C[-1] and sorted(C[:-1]) == ["B", "C", "D"]
+    assert "B -> C" in str(e.value) or "C -> D" in str(e.value)
+    G = GrapheSimpleNoCircuit(pred={"A": "A", "B": "A"})
+    assert not G.has_no_circuit() and G._circuit() == ["A", "A"]
+
+def test_mesures(pred_data, pond_data):
+    from grapheMPM import mesures
+    with mesures.Mesures() as m:
+        G = GrapheMPM(pred=dict(pred_data), pond=pond_data, sparse=True)
+        G.latestdate()
+        G.makeGraphviz()
+        G.Matrices[3]
+    R = m.resultats()
+    assert R["adjacence"]["appels"] == 1 # une seule passe de construction
+    assert R["setlevel.kahn"]["iterations"] == 6
+    assert R["setdata"]["noeuds"] == 11
+    assert R["makeGraphviz"]["aretes"] == 2 + 14 # début + arcs
+    assert R["puissances"]["octets"] > 0
+    assert R["ordonnancement"]["appels"] == 1
+    assert mesures._ECOUTEURS == [] # désactivé en sortie du bloc
+    assert mesures.phase("x") is mesures._INERTE
+    import json
+    assert json.loads(m.json()) == R
+
+def test_write_dot():
+    import io
+    from graphviz import Digraph
+    # noms à citer: espace, guillemet, mot clé, nombre, accent, port
+    n = ["a b", 'say "hi"', "node", "-4.2", "été", "x:p", "ok_1"]
+    p = {n[0]: [], n[1]: [n[0]], n[2]: [n[0], n[1]], n[3]: [n[2]],
+         n[4]: [n[3]], n[5]: [n[1]], n[6]: [n[4], n[5]]}
+    G = GrapheSimple(pred=p, sparse=True)
+    for fermeture in (False, True):
+        # construction de référence par l'API graphviz
+        dot = Digraph(comment="graphe orienté simple",
+                      node_attr={"shape":"ellipse"})
+        dot.attr("graph", rankdir="LR")
+        for k in G.successeurs:
+            dot.node(k)
+        M, A = G.mat_ferm_transitive if fermeture else G.mat_adj, G.mat_adj
+        for i in range(len(M)):
+            for j in range(len(M)):
+                if M[i, j]:
+                    dot.edge(G.num_sommets[i+1], G.num_sommets[j+1],
+                             color="black" if not fermeture or A[i, j] else "red")
+        G.makeGraphviz(fermeture=fermeture)
+        assert G.gv.source == dot.source
+        f = io.StringIO()
+        G.write_dot(f, fermeture=fermeture)
+        assert f.getvalue() == dot.source
+    H = GrapheMPM(pred=p, pond={k: 1.5 for k in p}, titre_debut='dé"but')
+    H.latestdate()
+    H.makeGraphviz()
+    assert H.write_dot() == H.gv.source and '[label="dé\\"but" ' in H.gv.source
+
+def test_accessibilite(pred_data):
+    import random
+    rng = random.Random(3)
+    N = 150
+    noms = [f"t{i}" for i in range(N)]
+    for circuit in (False, True):
+        p = {noms[i]: [noms[j] for j in rng.sample(range(i), min(2, i))]
+             for i in range(N)}
+        if circuit:
+            p["t10"] = p["t10"] + ["t90"]
+            p["t90"] = p["t90"] + ["t10"]
+        G = GrapheSimple(pred=p, sparse=True)
+        assert G.has_no_circuit() != circuit
+        for _ in range(200):
+            a, b = rng.choice(noms), rng.choice(noms)
+            assert G.reaches(a, b) == (b in G.descendants(a)) == (a in G.ancestors(b))
+        F = G.mat_ferm_transitive
+        assert [G.reaches(noms[0], k) for k in G._noms] == F[G._index["t0"]].tolist()
+    G = GrapheSimple(pred=pred_data, sparse=True)
+    assert G.ancestors("H") == ["A", "B", "C", "D", "E", "F"]
+    assert G.descendants("G") == ["I", "J"] and G._ferm is None
+
+def test_save_load(pred_data, tmp_path):
+    from grapheMPM.mesures import Mesures
+    w = {"A": 7, "B": 3, "C": 4.5, "D": 2, "E": 8,
+         "F": 6, "G": 5, "H": 7, "I": 5, "J": 3}
+    G = GrapheMPM(pred=dict(pred_data), pond=w, show_level=True)
+    G.latestdate()
+    G.makeGraphviz()
+    G.save(tmp_path / "plan")
+    with Mesures() as m:
+        H = GrapheMPM.load(tmp_path / "plan")
+        assert H.ed[H._index["fin"]] == G.ed[G._index["fin"]]
+        H.makeGraphviz()
+    assert H.gv.source == G.gv.source # aucun recalcul, même rendu
+    assert not {"setlevel.kahn", "ordonnancement", "adjacence"} & set(m.resultats())
+    assert H.niveaux == G.niveaux and H.successeurs == G.successeurs
+    # la projection en mémoire est en copie sur écriture
+    H.update_duration("C", 6)
+    G.update_duration("C", 6)
+    assert (H.mt == G.mt).all()
+    assert GrapheMPM.load(tmp_path / "plan", mmap=False).ed[G._index["C"]] == 7
+    G.ponderation["C"] = 12 # modification non encore reportée
+    G.save(tmp_path / "plan2")
+    H = GrapheMPM.load(tmp_path / "plan2")
+    assert H.ponderation["C"] == 12 and H.ed[H._index["fin"]] == 29
+    # modification de structure dès le chargement (niveaux non construits)
+    for modifier, arc in (("remove_dependency", ("C", "H")),
+                          ("add_dependency", ("A", "G"))):
+        H = GrapheMPM.load(tmp_path / "plan")
+        R = GrapheMPM(pred=dict(pred_data), pond=w)
+        for K in (H, R):
+            getattr(K, modifier)(*arc)
+            K.latestdate()
+        assert H.niveaux == R.niveaux and (H.mt == R.mt).all()
+
+def test_construction_une_passe(pred_data, pond_data):
+    from grapheMPM.mesures import Mesures
+    pred = {k: list(v) for k, v in pred_data.items()}
+    copie = {k: list(v) for k, v in pred.items()}
+    with Mesures() as m:
+        G = GrapheMPM(pred=pred, pond=pond_data, sparse=True)
+    assert m.resultats()["adjacence"]["appels"] == 1
+    assert pred == copie # le dict fourni n'est pas modifié
+    assert G.predecesseurs["fin"] == ["J"] and "fin" not in pred
+    succ = {k: v for k, v in G.successeurs.items() if k != "fin"}
+    succ["J"] = []
+    H = GrapheMPM(succ=succ, pond=pond_data)
+    assert H.predecesseurs == G.predecesseurs and list(H.sommets)[-1] == "fin"
+
+def test_virgule_fixe():
+    p = {"A": "", "B": "A", "C": "B", "D": "A"}
+    w = {"A": 0.1, "B": 0.2, "C": 2048.7, "D": "123456789.05"}
+    G = GrapheMPM(pred=p, pond=w, sparse=True)
+    G.latestdate()
+    G.makeGraphviz()
+    assert G._ed.dtype == "int64" and G._ed[G._index["C"]] == 30 # 0.1 + 0.2
+    assert G.sommets["C"].data["ed"] == "0.3"
+    assert G.sommets["fin"].data["ed"] == "123456789.15"
+    assert G.sommets["C"].data["mt"] == "123454740.15"
+    assert "C -> fin [label=2048.7 " in G.gv.source
+    G.update_duration("B", "0.125") # changement d'unité
+    G.makeGraphviz()
+    assert G.prec == 3 and G.sommets["C"].data["ed"] == "0.225"
+    assert G.ed[G._index["C"]] == 0.225
+
+def test_virgule_fixe_bornee():
+    # durées calculées: arrondies au millionième, sans débordement
+    p = {f"T{i:02d}": [f"T{i-1:02d}"] if i else [] for i in range(40)}
+    w = dict.fromkeys(p, 30)
+    w["T10"] = 1/3
+    G = GrapheMPM(pred=p, pond=w, sparse=True)
+    G.earliestdate()
+    assert G.prec == 6 and G.ed[G._index["fin"]] == 1170.333333
+    G = GrapheMPM(pred={"A": "", "B": "A"}, pond={"A": 0.1 + 0.2, "B": 100})
+    G.latestdate()
+    assert G.ed[G._index["fin"]] == 100.3 and G.ponderation["A"] == 0.3
+    # somme des durées hors des int64: erreur explicite
+    with pytest.raises(ValueError):
+        GrapheMPM(pred={"A": "", "B": "A"}, pond={"A": 10**17, "B": "0.25"})
+    G = GrapheMPM(pred={"A": "", "B": "A"}, pond={"A": 1e13, "B": 1})
+    with pytest.raises(ValueError):
+        G.update_duration("B", "0.123456")
+    assert G.prec == 1 and G.ponderation["B"] == 1 # rien n'a changé
+
+def test_write_latex():
+    import io
+    from grapheMPM import mat2tex, ecrire_pmatrix
+    N = 60 # 3600 coefficients: str(M) serait résumé par « ... »
+    p = {f"t_{i}": [f"t_{i-1}"] if i else [] for i in range(N)}
+    G = GrapheSimple(pred=p, sparse=True)
+    t = G.write_latex(matrices=["adjacence", 1, "fermeture"])
+    A, M1, F, T = t.split("\n\n", 3)
+    assert "..." not in t and A.count("\\\\") == N
+    assert A == M1 == mat2tex(G.mat_adj)
+    assert F == mat2tex(G.mat_ferm_transitive)
+    assert T == G.tab_latex_pred + "\n" + G.tab_latex_succ + "\n"
+    lignes = [L.split() for L in G.tab_latex_pred.splitlines()]
+    assert ["t\\_9", "&", "t\\_8", "\\\\"] in lignes # caractères échappés
+    f = io.StringIO()
+    ecrire_pmatrix(G.mat_adj[:2, :3], f)
+    assert f.getvalue() == "\\begin{pmatrix}\n  0 & 1 & 0\\\\\n  0 & 0 & 0\\\\\n\\end{pmatrix}"
+
+def test_reduction_transitive(pred_data, pond_data):
+    p = dict(pred_data, J="HIACF") # A, C, F -> J sont redondants
+    G = GrapheSimpleNoCircuit(pred=p, sparse=True)
+    R = G.transitive_reduction()
+    assert R["A"] == ["C", "D"] and R["F"] == ["H", "I"] and R["C"] == ["H"]
+    assert sum(map(len, R.values())) == sum(map(len, pred_data.values()))
+    assert GrapheSimple(succ=R, sparse=True).mat_ferm_transitive.tolist() \
+        == G.mat_ferm_transitive.tolist()
+    G.makeGraphviz(reduction=True)
+    assert "A -> J" not in G.gv.source and "H -> J" in G.gv.source
+    with pytest.raises(ValueError):
+        G.makeGraphviz(fermeture=True, reduction=True)
+    M = GrapheMPM(pred=p, pond=pond_data, sparse=True)
+    M.latestdate()
+    M.makeGraphviz(reduction=True)
+    N = GrapheMPM(pred=pred_data, pond=pond_data, sparse=True)
+    N.latestdate()
+    N.makeGraphviz()
+    assert M.gv.source == N.gv.source # mêmes dates, arcs redondants retirés
+    with pytest.raises(CircuitError):
+        GrapheSimple(pred={"A": "C", "B": "A", "C": "B"}).transitive_reduction()
+
+def test_vue_resumee(pred_data, pond_data):
+    G = GrapheMPM(pred=pred_data, pond=pond_data, sparse=True)
+    G.makeGraphviz(resume=True, voisinage=0)
+    src = G.gv.source
+    assert G.gv.engine == "dot" and "cluster_4" in src
+    for k in "BEFHJ": # chemin critique détaillé
+        assert f"\t\t{k} [label=<<TABLE" in src
+    assert '"résumé_1" [label="2 tâches\\nmarges 2 à 6"' in src
+    assert "H -> J [label=7 " in src and '"résumé_1" -> H [style=dashed]' in src
+    G.makeGraphviz(resume=True, voisinage=1, seuil=5) # grand graphe
+    src = G.gv.source
+    assert G.gv.engine == "sfdp" and "cluster" not in src
+    assert 'C [label="C\\n7 / 13" shape=box]' in src # voisin de H
+    assert '"résumé_0" [label="1 tâche\\nmarge 2"' in src # A seule résumée
+    assert "résumé_1" not in src
+    assert G.ed[G._index["fin"]] == 27
+    G.makeGraphviz() # la vue complète n'affiche pas de dates non demandées
+    assert G.gv.engine == "dot" and not G._affiche
+    assert G.sommets["fin"].data["ed"] == "    "
+
+def test_noms_longs_dense():
+    # en mode dense une chaîne est lue par recherche de sous-chaîne
+    w = {"T1": 2, "T2": 3, "T3": 4}
+    G = GrapheMPM(succ={"T1": "T2", "T2": "T3", "T3": ""}, pond=w)
+    assert G.successeurs == {"T1": ["T2"], "T2": ["T3"], "T3": ["fin"],
+                             "fin": []}
+    pred = {"T1": "", "T2": "T1", "T3": "T2"}
+    H = GrapheMPM(pred=pred, pond=w)
+    assert H.predecesseurs["fin"] == ["T3"] and "fin" not in pred
+    assert H.successeurs == G.successeurs and H.mat_adj.sum() == 3
+    H.earliestdate()
+    assert H.ed[H._index["fin"]] == 9
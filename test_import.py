@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+# budget du temps d'import de grapheMPM, numpy (indispensable) déjà chargé
+BUDGET = 0.25
+
+SCRIPT = """
+import sys, time
+import numpy
+t = time.perf_counter()
+import grapheMPM
+print(time.perf_counter() - t)
+print(",".join(m for m in ("pandas", "graphviz", "lxml") if m in sys.modules))
+"""
+
+def test_import_budget():
+    r = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True,
+                       text=True, check=True)
+    duree, modules = r.stdout.splitlines()
+    assert modules == "" # chargés seulement à la demande
+    assert float(duree) < BUDGET
@@ -0,0 +1,96 @@
+import os
+import pytest
+from grapheMPM import GrapheMPM, rendu
+from grapheMPM.rendu import CacheRendu
+
+@pytest.fixture
+def appels(monkeypatch):
+    # pas de binaire dot nécessaire: on remplace l'appel à graphviz
+    L = []
+    def executer(source, format, engine, renderer=None, formatter=None):
+        L.append((format, engine))
+        return b"%s:" % format.encode() + source[:40]
+    monkeypatch.setattr(rendu, "_executer", executer)
+    return L
+
+@pytest.fixture
+def G():
+    p = {"A": "", "B": "", "C": "A", "D": "AB", "E": "B"}
+    G = GrapheMPM(pred=p, pond={k: 2 for k in p})
+    G.earliestdate()
+    G.makeGraphviz()
+    return G
+
+def test_cache_rendu(G, appels, tmp_path):
+    cache = CacheRendu(tmp_path / "cache")
+    f = G.render(str(tmp_path / "ex"), format="svg", cache=cache)
+    assert f == str(tmp_path / "ex.svg") and os.path.exists(tmp_path / "ex")
+    G.render(str(tmp_path / "ex2"), format="svg", cache=cache)
+    assert appels == [("svg", "dot")] # second rendu servi par le cache
+    G.render(str(tmp_path / "ex"), format="png", cache=cache)
+    G.render(str(tmp_path / "ex"), format="png", engine="neato", cache=cache)
+    assert len(appels) == 3 and (cache.succes, cache.echecs) == (1, 3)
+    assert (tmp_path / "ex.svg").read_bytes() == (tmp_path / "ex2.svg").read_bytes()
+
+def test_cache_eviction(appels, tmp_path):
+    cache = CacheRendu(tmp_path, taille_max=100)
+    for i in range(10):
+        cache.obtenir(f"digraph {{ a{i} }}" + 30*" ", "png")
+    assert cache.taille() <= 100
+    # le plus récent est encore présent, le premier a été évincé
+    cache.obtenir("digraph { a9 }" + 30*" ", "png")
+    cache.obtenir("digraph { a0 }" + 30*" ", "png")
+    assert cache.succes == 1 and len(appels) == 11
+
+def test_rendre_lot(G, appels, tmp_path):
+    from grapheMPM import GrapheSimple
+    sans_gv = GrapheSimple(pred={"A": "", "B": "A"}) # makeGraphviz non appelé
+    R = rendu.rendre_lot([(G, str(tmp_path / "g"), ["png", "svg"]),
+                          (sans_gv, str(tmp_path / "s"), "png"),
+                          ("digraph { a -> b }", str(tmp_path / "d"), "pdf")],
+                         ouvriers=2, cache=False)
+    assert [(r.format, r.erreur is None) for r in R] == [
+        ("png", True), ("svg", True), ("png", False), ("pdf", True)]
+    assert isinstance(R[2].erreur, AttributeError) and R[2].chemin is None
+    assert (tmp_path / "d.pdf").read_bytes().startswith(b"pdf:digraph")
+    assert len(appels) == 3
+
+@pytest.fixture
+def commande(monkeypatch):
+    # « moteur » python: renvoie la source lue sur l'entrée standard, après
+    # une pause de la durée demandée par le nom du moteur
+    import sys
+    def commande(format, engine, renderer=None, formatter=None):
+        code = ("import sys, time; time.sleep(float(sys.argv[1])); "
+                "sys.stdout.buffer.write(sys.argv[2].encode() + "
+                "sys.stdin.buffer.read())")
+        return [sys.executable, "-c", code, engine, format]
+    monkeypatch.setattr(rendu, "_commande", commande)
+
+def test_arender(G, commande):
+    import asyncio, time
+    async def principal():
+        png = await G.arender("png", engine="0")
+        assert png == b"png" + G.write_dot().encode()
+        # au plus 2 rendus simultanés: 4 rendus de 0.3 s en 0.6 s au moins
+        S = asyncio.Semaphore(2)
+        t = time.perf_counter()
+        R = await asyncio.gather(*[rendu.arendre("digraph {}", "svg", "0.3",
+                                                 semaphore=S)
+                                   for _ in range(4)])
+        assert time.perf_counter() - t >= 0.55
+        assert R == 4*[b"svgdigraph {}"]
+        with pytest.raises(TimeoutError):
+            await G.arender("png", engine="5", timeout=0.2)
+        S = await asyncio.gather(G.arender("svg", engine="0", resume=True),
+                                 G.arender("svg", engine="0"))
+        assert S == [b"svg" + G.write_dot(resume=True).encode(),
+                     b"svg" + G.write_dot().encode()]
+    asyncio.run(principal())
+
+def test_arender_erreur(G):
+    import asyncio, subprocess
+    async def principal():
+        with pytest.raises(subprocess.CalledProcessError):
+            await rendu.arendre("digraph {", "png", engine="false")
+    asyncio.run(principal())
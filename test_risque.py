@@ -0,0 +1,42 @@
+import pytest
+from grapheMPM import GrapheMPM
+from grapheMPM import risque
+from grapheMPM.risque import (analyse_risque, BetaPERT, Triangulaire,
+                              Empirique)
+
+@pytest.fixture
+def MPM_data():
+    p = {"A": "", "B": "", "C": "A", "D": "AB", "E":"B",
+         "F":"DE", "G": "E", "H":"CF", "I":"FG", "J": "HI"}
+    w = {"A": 7, "B": 3, "C": 4, "D": 2, "E": 8,
+         "F": 6, "G": 5, "H": 7, "I": 5, "J": 3}
+    return GrapheMPM(pred=p, pond=w)
+
+@pytest.fixture
+def lois():
+    return {"C": BetaPERT(3, 4, 12), "E": Triangulaire(6, 8, 14),
+            "H": Empirique([6, 7, 9])}
+
+def test_analyse_bornes(MPM_data, lois):
+    acc = analyse_risque(MPM_data, lois, 5000, graine=2, processus=1,
+                         taille_lot=1000)
+    assert acc.n == 5000 and acc.histogramme.sum() == 5000
+    assert acc.lo <= acc.min <= acc.quantile(0.5) <= acc.max <= acc.hi
+    c = acc.criticite()
+    assert c["J"] == 1 and c["D"] == 0 and "fin" not in c
+
+def test_analyse_reproductible(MPM_data, lois):
+    a = analyse_risque(MPM_data, lois, 3000, graine=7, processus=1,
+                       taille_lot=500)
+    b = analyse_risque(MPM_data, lois, 3000, graine=7, processus=2,
+                       taille_lot=500)
+    assert (a.histogramme == b.histogramme).all()
+    assert (a.critiques == b.critiques).all()
+    assert a.resume() == b.resume()
+
+def test_analyse_ponderation_modifiee(MPM_data):
+    MPM_data.ponderation["C"] = 12 # C devient critique: 7+12+7+3 = 29
+    acc = analyse_risque(MPM_data, {"E": Empirique([8])}, 100, graine=1,
+                         processus=1)
+    assert acc.min == acc.max == 29 and acc.criticite()["C"] == 1
+    assert risque._CONTEXTE is None # rien ne reste dans ce processus